@@ -3,6 +3,7 @@ Pipeline API Routes - Main automation control endpoints
 """
 
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from sqlalchemy import case, func
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any, Optional
 from datetime import datetime
@@ -12,6 +13,7 @@ from database.connection import get_database
 from database.models import Pipeline, Video, SystemLog
 from core.pipeline_manager import get_pipeline_manager
 from api.schemas import PipelineStatus, PipelineConfig, PipelineStats
+import uuid
 
 router = APIRouter()
 
@@ -94,12 +96,13 @@ async def get_queue():
 @router.post("/queue/add")
 async def add_to_queue(
     video_data: Dict[str, Any],
+    background_tasks: BackgroundTasks,
     priority: int = 0,
     db: Session = Depends(get_database)
 ):
     """Add a video generation job to the queue"""
     pipeline_manager = get_pipeline_manager()
-    
+
     try:
         # Create video record
         video = Video(
@@ -110,25 +113,29 @@ async def add_to_queue(
             generation_parameters=video_data.get("parameters", {}),
             status="pending"
         )
-        
+
         db.add(video)
         db.commit()
         db.refresh(video)
-        
-        # Add to pipeline queue
-        job_id = await pipeline_manager.add_job(
+
+        # Enqueue after the response is sent so the client never waits on
+        # queue work; the job id is pre-generated to keep the response shape
+        job_id = str(uuid.uuid4())
+        background_tasks.add_task(
+            pipeline_manager.add_job,
             job_type="generate_video",
             video_id=video.id,
             data=video_data,
-            priority=priority
+            priority=priority,
+            job_id=job_id
         )
-        
+
         return {
             "status": "success",
             "message": "Job added to queue",
             "job_id": job_id,
             "video_id": video.id,
-            "position": pipeline_manager.get_queue_size()
+            "position": pipeline_manager.get_queue_size() + 1
         }
         
     except Exception as e:
@@ -179,10 +186,13 @@ async def get_pipeline_stats(
     """Get pipeline statistics"""
     pipeline_manager = get_pipeline_manager()
     
-    # Get database stats
-    total_videos = db.query(Video).count()
-    uploaded_videos = db.query(Video).filter(Video.youtube_video_id.isnot(None)).count()
-    failed_videos = db.query(Video).filter(Video.status == "failed").count()
+    # Get database stats in a single aggregate query instead of three scans
+    total_videos, uploaded_videos, failed_videos = db.query(
+        func.count(Video.id),
+        func.count(Video.youtube_video_id),
+        func.sum(case((Video.status == "failed", 1), else_=0))
+    ).one()
+    failed_videos = failed_videos or 0
     
     # Calculate success rate
     success_rate = (uploaded_videos / total_videos * 100) if total_videos > 0 else 0
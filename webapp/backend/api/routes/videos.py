@@ -2,51 +2,183 @@
 Videos API Routes - Video management and upload operations
 """
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response, UploadFile, File, Form
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, raiseload
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 from pathlib import Path
+import asyncio
 import os
+import uuid
 
-from database.connection import get_database
+import aiofiles
+import hashlib
+import orjson
+
+from database.connection import get_async_database
 from database.models import Video, VideoAnalytics
 from core.pipeline_manager import get_pipeline_manager
 
+# Optional Redis response cache - routes degrade to plain DB reads without it
+try:
+    import redis.asyncio as aioredis
+    redis_client = aioredis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis_client = None
+    REDIS_AVAILABLE = False
+
+STATS_CACHE_KEY = "stats:summary"
+STATS_CACHE_TTL = 30  # seconds
+
+async def cache_get(key: str) -> Optional[Any]:
+    """Fetch a cached JSON payload; any Redis failure falls through to the DB"""
+    if not REDIS_AVAILABLE:
+        return None
+    try:
+        cached = await redis_client.get(key)
+        return orjson.loads(cached) if cached else None
+    except Exception:
+        return None
+
+async def cache_set(key: str, payload: Any, ttl: int = STATS_CACHE_TTL):
+    """Store a JSON payload with a TTL; failures are ignored"""
+    if not REDIS_AVAILABLE:
+        return
+    try:
+        await redis_client.setex(key, ttl, orjson.dumps(payload))
+    except Exception:
+        pass
+
+async def cache_invalidate(*keys: str):
+    """Drop cached payloads after a write"""
+    if not REDIS_AVAILABLE or not keys:
+        return
+    try:
+        await redis_client.delete(*keys)
+    except Exception:
+        pass
+
 router = APIRouter()
 
-@router.get("/", response_model=List[Dict[str, Any]])
+# Chunk size for streamed file writes (1 MiB keeps memory flat per upload)
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Hard ceiling on upload size - checked against Content-Length up front and
+# enforced again while streaming in case the header lied or was absent
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 5 * 1024**3))
+
+# With SQLA_STRICT_LOADING=1 any relationship not explicitly eager-loaded
+# raises instead of silently lazy-loading, so N+1s fail loudly in dev/CI
+SQLA_STRICT_LOADING = os.getenv("SQLA_STRICT_LOADING", "0") == "1"
+
+def video_detail_options():
+    """Loader options for single-video reads"""
+    options = [joinedload(Video.analytics)]
+    if SQLA_STRICT_LOADING:
+        options.append(raiseload('*'))
+    return options
+
+# Columns returned by list views - mirrors Video.to_dict() so the list
+# endpoint can skip ORM instance hydration and emit rows directly
+VIDEO_LIST_COLUMNS = (
+    Video.id, Video.uuid, Video.title, Video.description, Video.filename,
+    Video.file_size, Video.duration, Video.prompt, Video.ai_model,
+    Video.youtube_video_id, Video.youtube_url, Video.status,
+    Video.upload_status, Video.progress, Video.error_message,
+    Video.created_at, Video.updated_at, Video.generated_at, Video.uploaded_at
+)
+
+# Whitelist for the ?fields= projection - anything else is a 400
+VIDEO_FIELD_MAP = {column.key: column for column in VIDEO_LIST_COLUMNS}
+
+@router.get("/")
 async def get_videos(
     status: Optional[str] = None,
+    fields: Optional[str] = None,
     limit: int = 50,
     offset: int = 0,
-    db: Session = Depends(get_database)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_database)
 ):
     """Get list of videos with optional filtering"""
-    query = db.query(Video).order_by(Video.created_at.desc())
-    
+    # Project only the requested columns so long description/prompt blobs
+    # aren't shipped and encoded when the list view doesn't render them
+    if fields:
+        requested = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in requested if name not in VIDEO_FIELD_MAP]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(unknown)}"
+            )
+        columns = [VIDEO_FIELD_MAP[name] for name in requested]
+    else:
+        columns = VIDEO_LIST_COLUMNS
+
+    count_stmt = select(func.count(Video.id))
+    stmt = select(*columns)
+
     if status:
-        query = query.filter(Video.status == status)
-    
-    videos = query.offset(offset).limit(limit).all()
-    
-    return {
-        "videos": [video.to_dict() for video in videos],
-        "total": query.count(),
+        count_stmt = count_stmt.where(Video.status == status)
+        stmt = stmt.where(Video.status == status)
+
+    # Keyset pagination: a cursor (created_at of the last row seen) costs
+    # the same at any depth, whereas OFFSET reads and discards N rows per
+    # page. offset stays supported for callers that don't send a cursor.
+    if cursor:
+        try:
+            cursor_dt = datetime.fromisoformat(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor - expected ISO 8601 timestamp")
+        stmt = stmt.where(Video.created_at < cursor_dt)
+
+    # Count the filtered set once, before ordering/pagination is applied,
+    # so the total is correct and not recomputed as a limited subquery
+    total = (await db.execute(count_stmt)).scalar()
+
+    # Core select + mappings() skips ORM instance construction and the
+    # identity map entirely - list views are read-only so hydration is waste
+    stmt = stmt.order_by(Video.created_at.desc()).limit(limit)
+    if not cursor:
+        stmt = stmt.offset(offset)
+    videos = [dict(row) for row in (await db.execute(stmt)).mappings()]
+
+    next_cursor = None
+    if len(videos) == limit and videos and videos[-1].get("created_at"):
+        next_cursor = videos[-1]["created_at"].isoformat()
+
+    # Serialize straight through orjson (datetimes become RFC 3339 strings),
+    # bypassing FastAPI's jsonable_encoder pass over every row
+    return ORJSONResponse({
+        "videos": videos,
+        "total": total,
         "limit": limit,
-        "offset": offset
-    }
+        "offset": offset,
+        "next_cursor": next_cursor
+    })
 
 @router.get("/{video_id}", response_model=Dict[str, Any])
-async def get_video(video_id: int, db: Session = Depends(get_database)):
+async def get_video(video_id: int, db: AsyncSession = Depends(get_async_database)):
     """Get specific video details"""
-    video = db.query(Video).filter(Video.id == video_id).first()
-    
+    if cached := await cache_get(f"video:{video_id}"):
+        return cached
+
+    # joinedload pulls the 1:1 analytics row in the same SELECT (no lazy-load round-trip)
+    result = await db.execute(
+        select(Video).options(*video_detail_options()).where(Video.id == video_id)
+    )
+    video = result.scalar_one_or_none()
+
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
-    
+
     video_data = video.to_dict()
-    
+
     # Include analytics if available
     if video.analytics:
         video_data["analytics"] = {
@@ -56,56 +188,124 @@ async def get_video(video_id: int, db: Session = Depends(get_database)):
             "watch_time": video.analytics.watch_time_minutes,
             "ctr": video.analytics.click_through_rate
         }
-    
+
+    await cache_set(f"video:{video_id}", video_data)
     return video_data
 
 @router.post("/upload", response_model=Dict[str, Any])
 async def upload_video_file(
+    request: Request,
     file: UploadFile = File(...),
     title: Optional[str] = Form(None),
     description: Optional[str] = Form(None),
     prompt: Optional[str] = Form(None),
-    db: Session = Depends(get_database)
+    db: AsyncSession = Depends(get_async_database)
 ):
     """Upload a video file and add to processing queue"""
-    
+
     # Validate file type
     if not file.filename.lower().endswith(('.mp4', '.mov', '.avi', '.mkv', '.webm')):
         raise HTTPException(
-            status_code=400, 
+            status_code=400,
             detail="Invalid file type. Supported: mp4, mov, avi, mkv, webm"
         )
-    
+
+    # Reject oversize bodies before any disk or DB work
+    content_length = request.headers.get("content-length")
+    if content_length and int(content_length) > MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Upload exceeds maximum size of {MAX_UPLOAD_BYTES} bytes"
+        )
+
     try:
-        # Create video record
+        # Generate the uuid client-side so the target path is known before
+        # any INSERT - the row can then be committed exactly once, fully
+        # populated, instead of insert-commit + update-commit per upload
+        video_uuid = str(uuid.uuid4())
+
+        upload_dir = Path("videos/input")
+        await asyncio.to_thread(upload_dir.mkdir, parents=True, exist_ok=True)
+
+        file_path = upload_dir / f"{video_uuid}_{file.filename}"
+
+        # Stream the upload to disk chunk by chunk so peak memory stays at
+        # one chunk rather than the whole body; hash inline for dedup use
+        size = 0
+        hasher = hashlib.blake2b()
+        async with aiofiles.open(file_path, "wb") as f:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    # Header lied (or was missing) - stop writing and clean up
+                    await asyncio.to_thread(_unlink_quietly, str(file_path))
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Upload exceeds maximum size of {MAX_UPLOAD_BYTES} bytes"
+                    )
+                hasher.update(chunk)
+                await f.write(chunk)
+
+        # Record the size the filesystem actually holds after close, rather
+        # than what we think we streamed - the two diverge on partial writes
+        file_size = await asyncio.to_thread(os.path.getsize, file_path)
+
+        # Duplicate content short-circuit: if this exact file already exists,
+        # drop the fresh copy and reuse the existing row - no new DB work
+        # and no duplicate pipeline job
+        content_hash = hasher.hexdigest()
+        existing = (await db.execute(
+            select(Video).where(Video.content_hash == content_hash)
+        )).scalar_one_or_none()
+        if existing:
+            await asyncio.to_thread(_unlink_quietly, str(file_path))
+            return {
+                "status": "success",
+                "message": "Duplicate upload - existing video reused",
+                "video_id": existing.id,
+                "job_id": None,
+                "file_path": existing.file_path,
+                "deduped": True
+            }
+
+        # Create the fully-populated video record in a single transaction
         video = Video(
+            uuid=video_uuid,
             title=title or file.filename,
             description=description or "",
             filename=file.filename,
             prompt=prompt or "",
+            file_path=str(file_path),
+            file_size=file_size,
+            content_hash=content_hash,
             status="pending"
         )
-        
+
         db.add(video)
-        db.commit()
-        db.refresh(video)
-        
-        # Save uploaded file
-        upload_dir = Path("videos/input")
-        upload_dir.mkdir(parents=True, exist_ok=True)
-        
-        file_path = upload_dir / f"{video.id}_{file.filename}"
-        
-        # Save file
-        content = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(content)
-        
-        # Update video record with file info
-        video.file_path = str(file_path)
-        video.file_size = len(content)
-        db.commit()
-        
+        try:
+            await db.commit()
+        except IntegrityError:
+            # Two concurrent uploads of the same new file both pass the
+            # dedup SELECT; the unique index rejects the second INSERT.
+            # Treat it like any other duplicate: drop the copy, reuse the row.
+            await db.rollback()
+            existing = (await db.execute(
+                select(Video).where(Video.content_hash == content_hash)
+            )).scalar_one_or_none()
+            await asyncio.to_thread(_unlink_quietly, str(file_path))
+            if existing:
+                return {
+                    "status": "success",
+                    "message": "Duplicate upload - existing video reused",
+                    "video_id": existing.id,
+                    "job_id": None,
+                    "file_path": existing.file_path,
+                    "deduped": True
+                }
+            raise
+
+        await cache_invalidate(STATS_CACHE_KEY)
+
         # Add to processing queue
         pipeline_manager = get_pipeline_manager()
         job_id = await pipeline_manager.add_job(
@@ -119,7 +319,7 @@ async def upload_video_file(
                 }
             }
         )
-        
+
         return {
             "status": "success",
             "message": "Video uploaded and queued for processing",
@@ -127,84 +327,99 @@ async def upload_video_file(
             "job_id": job_id,
             "file_path": str(file_path)
         }
-        
+
+    except HTTPException:
+        raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
 @router.put("/{video_id}", response_model=Dict[str, Any])
 async def update_video(
     video_id: int,
     video_data: Dict[str, Any],
-    db: Session = Depends(get_database)
+    db: AsyncSession = Depends(get_async_database)
 ):
     """Update video metadata"""
-    video = db.query(Video).filter(Video.id == video_id).first()
-    
+    video = (await db.execute(select(Video).where(Video.id == video_id))).scalar_one_or_none()
+
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
-    
+
     # Update allowed fields
     updateable_fields = ['title', 'description', 'prompt']
     for field in updateable_fields:
         if field in video_data:
             setattr(video, field, video_data[field])
-    
+
     video.updated_at = datetime.now()
-    db.commit()
-    
+    await db.commit()
+
+    await cache_invalidate(STATS_CACHE_KEY, f"video:{video_id}")
+
     return {
         "status": "success",
         "message": "Video updated successfully",
         "video": video.to_dict()
     }
 
-@router.delete("/{video_id}")
-async def delete_video(video_id: int, db: Session = Depends(get_database)):
+def _unlink_quietly(file_path: str):
+    """Best-effort file removal for deferred cleanup"""
+    try:
+        os.unlink(file_path)
+    except OSError as e:
+        print(f"Deferred unlink failed for {file_path}: {e}")
+
+@router.delete("/{video_id}", status_code=204)
+async def delete_video(
+    video_id: int,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_database)
+):
     """Delete a video"""
-    video = db.query(Video).filter(Video.id == video_id).first()
-    
+    video = (await db.execute(select(Video).where(Video.id == video_id))).scalar_one_or_none()
+
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
-    
+
+    file_path = video.file_path
+
     try:
-        # Delete file if exists
-        if video.file_path and Path(video.file_path).exists():
-            os.remove(video.file_path)
-        
-        # Delete from database
-        db.delete(video)
-        db.commit()
-        
-        return {
-            "status": "success",
-            "message": "Video deleted successfully"
-        }
-        
+        # Only the DB delete happens on the request path; the (potentially
+        # slow) file unlink runs after the response has been sent
+        await db.delete(video)
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Delete failed: {str(e)}")
 
+    await cache_invalidate(STATS_CACHE_KEY, f"video:{video_id}")
+
+    if file_path:
+        background_tasks.add_task(_unlink_quietly, file_path)
+
+    return Response(status_code=204)
+
 @router.post("/{video_id}/retry")
-async def retry_video_upload(video_id: int, db: Session = Depends(get_database)):
+async def retry_video_upload(video_id: int, db: AsyncSession = Depends(get_async_database)):
     """Retry uploading a failed video"""
-    video = db.query(Video).filter(Video.id == video_id).first()
-    
+    video = (await db.execute(select(Video).where(Video.id == video_id))).scalar_one_or_none()
+
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
-    
+
     if video.status not in ['failed', 'pending']:
         raise HTTPException(
-            status_code=400, 
+            status_code=400,
             detail=f"Cannot retry video with status: {video.status}"
         )
-    
+
     # Reset video status
     video.status = "pending"
     video.error_message = None
     video.updated_at = datetime.now()
-    db.commit()
-    
+    await db.commit()
+
     # Add to queue again
     pipeline_manager = get_pipeline_manager()
     job_id = await pipeline_manager.add_job(
@@ -219,7 +434,7 @@ async def retry_video_upload(video_id: int, db: Session = Depends(get_database))
         },
         priority=5  # Higher priority for retries
     )
-    
+
     return {
         "status": "success",
         "message": "Video queued for retry",
@@ -227,20 +442,23 @@ async def retry_video_upload(video_id: int, db: Session = Depends(get_database))
     }
 
 @router.get("/{video_id}/analytics", response_model=Dict[str, Any])
-async def get_video_analytics(video_id: int, db: Session = Depends(get_database)):
+async def get_video_analytics(video_id: int, db: AsyncSession = Depends(get_async_database)):
     """Get detailed analytics for a video"""
-    video = db.query(Video).filter(Video.id == video_id).first()
-    
+    result = await db.execute(
+        select(Video).options(*video_detail_options()).where(Video.id == video_id)
+    )
+    video = result.scalar_one_or_none()
+
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
-    
+
     if not video.analytics:
         return {
             "video_id": video_id,
             "message": "No analytics data available",
             "analytics": None
         }
-    
+
     analytics = video.analytics
     return {
         "video_id": video_id,
@@ -262,97 +480,126 @@ async def get_video_analytics(video_id: int, db: Session = Depends(get_database)
 @router.post("/batch-upload")
 async def batch_upload_from_folder(
     folder_path: str,
-    db: Session = Depends(get_database)
+    db: AsyncSession = Depends(get_async_database)
 ):
     """Process all videos in a folder for upload"""
     folder = Path(folder_path)
-    
-    if not folder.exists() or not folder.is_dir():
+
+    if not await asyncio.to_thread(lambda: folder.exists() and folder.is_dir()):
         raise HTTPException(status_code=400, detail="Invalid folder path")
-    
-    # Find video files
-    video_extensions = ['.mp4', '.mov', '.avi', '.mkv', '.webm']
-    video_files = []
-    
-    for ext in video_extensions:
-        video_files.extend(folder.glob(f"*{ext}"))
-        video_files.extend(folder.glob(f"*{ext.upper()}"))
-    
+
+    def _scan_folder():
+        """Single scandir pass filtering by extension (runs in a worker thread)"""
+        video_extensions = {'.mp4', '.mov', '.avi', '.mkv', '.webm'}
+        return [
+            (entry.name, entry.path, entry.stat().st_size)
+            for entry in os.scandir(folder)
+            if entry.is_file() and Path(entry.name).suffix.lower() in video_extensions
+        ]
+
+    # The directory scan and stat calls hit disk - keep them off the loop
+    video_files = await asyncio.to_thread(_scan_folder)
+
     if not video_files:
         return {
             "status": "warning",
             "message": "No video files found in folder",
             "processed": 0
         }
-    
-    processed_videos = []
+
+    # One executemany INSERT + one commit instead of a commit per file
+    rows = [
+        {
+            "uuid": str(uuid.uuid4()),
+            "title": Path(name).stem.replace('_', ' ').title(),
+            "filename": name,
+            "file_path": path,
+            "file_size": file_size,
+            "status": "pending"
+        }
+        for name, path, file_size in video_files
+    ]
+    await db.run_sync(lambda s: s.bulk_insert_mappings(Video, rows, return_defaults=True))
+    await db.commit()
+
     pipeline_manager = get_pipeline_manager()
-    
-    for video_file in video_files:
-        try:
-            # Create video record
-            video = Video(
-                title=video_file.stem.replace('_', ' ').title(),
-                filename=video_file.name,
-                file_path=str(video_file),
-                file_size=video_file.stat().st_size,
-                status="pending"
-            )
-            
-            db.add(video)
-            db.commit()
-            db.refresh(video)
-            
-            # Add to processing queue
-            job_id = await pipeline_manager.add_job(
-                job_type="upload_video",
-                video_id=video.id,
-                data={
-                    "file_path": str(video_file),
-                    "metadata": {
-                        "title": video.title
-                    }
+
+    # Dispatch all enqueues concurrently; a failure on one file doesn't
+    # abort the rest (exceptions come back in-place from gather)
+    job_results = await asyncio.gather(*[
+        pipeline_manager.add_job(
+            job_type="upload_video",
+            video_id=row["id"],
+            data={
+                "file_path": row["file_path"],
+                "metadata": {
+                    "title": row["title"]
                 }
-            )
-            
-            processed_videos.append({
-                "video_id": video.id,
-                "filename": video.filename,
-                "job_id": job_id
-            })
-            
-        except Exception as e:
-            print(f"Error processing {video_file}: {e}")
+            }
+        )
+        for row in rows
+    ], return_exceptions=True)
+
+    processed_videos = []
+    for row, job_id in zip(rows, job_results):
+        if isinstance(job_id, Exception):
+            print(f"Error queueing {row['filename']}: {job_id}")
             continue
-    
-    return {
+
+        processed_videos.append({
+            "video_id": row["id"],
+            "filename": row["filename"],
+            "job_id": job_id
+        })
+
+    # Large folders can produce thousands of entries - stream the JSON out
+    # item by item so TTFB is the first entry and peak memory is one item,
+    # not the whole serialized response
+    header = orjson.dumps({
         "status": "success",
         "message": f"Processed {len(processed_videos)} videos from folder",
         "processed": len(processed_videos),
-        "total_found": len(video_files),
-        "videos": processed_videos
-    }
+        "total_found": len(video_files)
+    })
+
+    def generate():
+        yield header[:-1] + b',"videos":['
+        for i, item in enumerate(processed_videos):
+            if i:
+                yield b","
+            yield orjson.dumps(item)
+        yield b"]}"
+
+    return StreamingResponse(generate(), media_type="application/json")
 
 @router.get("/stats/summary")
-async def get_video_stats(db: Session = Depends(get_database)):
+async def get_video_stats(db: AsyncSession = Depends(get_async_database)):
     """Get video statistics summary"""
-    
-    # Basic counts
-    total_videos = db.query(Video).count()
-    uploaded_videos = db.query(Video).filter(Video.youtube_video_id.isnot(None)).count()
-    failed_videos = db.query(Video).filter(Video.status == "failed").count()
-    pending_videos = db.query(Video).filter(Video.status.in_(["pending", "generating", "uploading"])).count()
-    
-    # Recent activity (last 7 days)
+    if cached := await cache_get(STATS_CACHE_KEY):
+        return cached
+
+    # All five counts come back from one table scan using FILTERed aggregates
     week_ago = datetime.now() - timedelta(days=7)
-    recent_uploads = db.query(Video).filter(
-        Video.uploaded_at >= week_ago
-    ).count()
-    
+    row = (await db.execute(
+        select(
+            func.count().label("total"),
+            func.count().filter(Video.youtube_video_id.isnot(None)).label("uploaded"),
+            func.count().filter(Video.status == "failed").label("failed"),
+            func.count().filter(Video.status.in_(["pending", "generating", "uploading"])).label("pending"),
+            func.count().filter(Video.uploaded_at >= week_ago).label("recent")
+        ).select_from(Video)
+    )).one()
+
+    total_videos = row.total
+    uploaded_videos = row.uploaded
+    failed_videos = row.failed
+    pending_videos = row.pending
+    recent_uploads = row.recent
+
     # Calculate success rate
     success_rate = (uploaded_videos / total_videos * 100) if total_videos > 0 else 0
-    
-    return {
+
+    stats = {
         "total_videos": total_videos,
         "uploaded_videos": uploaded_videos,
         "failed_videos": failed_videos,
@@ -360,4 +607,7 @@ async def get_video_stats(db: Session = Depends(get_database)):
         "recent_uploads": recent_uploads,
         "success_rate": round(success_rate, 2),
         "stats_generated_at": datetime.now().isoformat()
-    }
\ No newline at end of file
+    }
+
+    await cache_set(STATS_CACHE_KEY, stats)
+    return stats
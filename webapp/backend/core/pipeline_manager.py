@@ -3,10 +3,13 @@ Pipeline Manager - Core automation orchestration
 """
 
 import asyncio
+import functools
+import heapq
 import time
 import json
 import os
 import sys
+from collections import deque
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -19,7 +22,13 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 from src.video_uploader import VideoUploader
 from src.file_monitor import VideoMonitor
 from src.config_manager import ConfigManager
-from core.websocket_manager import WebSocketManager
+from core.websocket_manager import WebSocketManager, now_ms
+
+def _to_iso(ms: Optional[int]) -> Optional[str]:
+    """Convert a Unix-ms timestamp back to ISO-8601 for REST responses"""
+    if ms is None:
+        return None
+    return datetime.fromtimestamp(ms / 1000).isoformat()
 
 class PipelineStatus(Enum):
     IDLE = "idle"
@@ -44,27 +53,42 @@ class Job:
         self.data = data
         self.priority = priority
         self.status = JobStatus.QUEUED
-        self.created_at = datetime.now()
+        # Timestamps are Unix ms ints — a single time.time() call instead of
+        # datetime construction plus isoformat() on every serialization
+        self.created_at = now_ms()
         self.started_at = None
         self.completed_at = None
         self.error_message = None
         self.progress = 0.0
         self.result = None
-        
+
+    def __setattr__(self, name, value):
+        # Any state change invalidates the cached to_dict() representation
+        super().__setattr__(name, value)
+        if name != "_dict_cache":
+            super().__setattr__("_dict_cache", None)
+
     def to_dict(self) -> Dict[str, Any]:
-        return {
+        # Jobs are serialized on every queue snapshot and WS event; rebuild
+        # the dict (and re-run isoformat) only when a field actually changed
+        cached = self._dict_cache
+        if cached is not None:
+            return cached
+        result = {
             "job_id": self.job_id,
             "job_type": self.job_type,
             "data": self.data,
             "priority": self.priority,
             "status": self.status.value,
-            "created_at": self.created_at.isoformat(),
-            "started_at": self.started_at.isoformat() if self.started_at else None,
-            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "completed_at": self.completed_at,
             "error_message": self.error_message,
             "progress": self.progress,
             "result": self.result
         }
+        self._dict_cache = result
+        return result
 
 class PipelineManager:
     """Main pipeline orchestration manager"""
@@ -74,11 +98,21 @@ class PipelineManager:
         self.status = PipelineStatus.IDLE
         self.started_at = None
         self.stopped_at = None
+        # Monotonic start reference so uptime math doesn't need wall-clock reads
+        self._started_monotonic = None
         
-        # Job management
-        self.job_queue: List[Job] = []
-        self.active_jobs: Dict[str, Job] = {}
-        self.completed_jobs: List[Job] = []
+        # Job management. The queue is a min-heap of (-priority, seq, job)
+        # entries, so enqueue is O(log n) instead of a linear priority scan;
+        # seq keeps FIFO order among equal priorities. Cancelled jobs stay in
+        # the heap as tombstones and are skipped on pop (lazy deletion).
+        self.job_queue: List[tuple] = []
+        self._seq = 0
+        # Active jobs map job_id -> (job, task); the task's done-callback
+        # handles cleanup so the main loop doesn't have to poll for it
+        self.active_jobs: Dict[str, tuple] = {}
+        # Bounded history: a long-running pipeline would otherwise grow this
+        # list forever; the deque evicts the oldest entry in O(1)
+        self.completed_jobs: deque = deque(maxlen=1000)
         self.max_concurrent_jobs = 3
         
         # Components
@@ -91,6 +125,7 @@ class PipelineManager:
             "jobs_processed": 0,
             "jobs_failed": 0,
             "videos_uploaded": 0,
+            "completed_evicted": 0,
             "total_processing_time": 0,
             "last_activity": None
         }
@@ -98,6 +133,13 @@ class PipelineManager:
         # Background tasks
         self.main_task = None
         self.monitor_task = None
+        # Strong refs for fire-and-forget broadcast tasks: the event loop
+        # only weak-refs tasks, so an unreferenced one can be GC'd unrun
+        self._broadcast_tasks: set = set()
+
+        # Wakes the main loop when there is new work (job added or a slot
+        # freed), so dispatch latency isn't bounded by a poll interval
+        self._wake = asyncio.Event()
         
     async def start(self) -> bool:
         """Start the pipeline"""
@@ -107,6 +149,7 @@ class PipelineManager:
         try:
             self.status = PipelineStatus.RUNNING
             self.started_at = datetime.now()
+            self._started_monotonic = time.monotonic()
             self.stopped_at = None
             
             # Start main processing loop
@@ -151,9 +194,12 @@ class PipelineManager:
             if self.monitor_task and not self.monitor_task.done():
                 self.monitor_task.cancel()
                 
-            # Wait for active jobs to complete or cancel them
-            for job in self.active_jobs.values():
-                job.status = JobStatus.CANCELLED
+            # Cancel active jobs for real: the task reference kept in
+            # active_jobs lets us interrupt the coroutine instead of just
+            # flipping the status flag and letting it run on
+            for job, task in list(self.active_jobs.values()):
+                if not task.done():
+                    task.cancel()
                 
             self.status = PipelineStatus.IDLE
             
@@ -200,56 +246,55 @@ class PipelineManager:
         
         return True
     
-    async def add_job(self, job_type: str, video_id: int = None, data: Dict[str, Any] = None, priority: int = 0) -> str:
+    async def add_job(self, job_type: str, video_id: int = None, data: Dict[str, Any] = None, priority: int = 0, job_id: str = None) -> str:
         """Add a job to the queue"""
-        job_id = str(uuid.uuid4())
+        job_id = job_id or str(uuid.uuid4())
         
         job_data = data or {}
         if video_id:
             job_data["video_id"] = video_id
             
         job = Job(job_id, job_type, job_data, priority)
-        
-        # Insert job based on priority (higher priority first)
-        inserted = False
-        for i, queued_job in enumerate(self.job_queue):
-            if job.priority > queued_job.priority:
-                self.job_queue.insert(i, job)
-                inserted = True
-                break
-                
-        if not inserted:
-            self.job_queue.append(job)
-            
+
+        # Push onto the heap (higher priority first, FIFO within a priority)
+        self._seq += 1
+        heapq.heappush(self.job_queue, (-job.priority, self._seq, job))
+
         # Notify via WebSocket
         await self.websocket_manager.broadcast({
             "type": "job_added",
             "job": job.to_dict(),
-            "queue_size": len(self.job_queue)
+            "queue_size": self.get_queue_size()
         })
         
+        # Wake the dispatcher
+        self._wake.set()
+        self.stats["last_activity"] = now_ms()
+
         print(f"Added job {job_id} ({job_type}) to queue with priority {priority}")
         return job_id
     
     async def remove_job(self, job_id: str) -> bool:
         """Remove a job from the queue"""
-        # Check queue
-        for i, job in enumerate(self.job_queue):
-            if job.job_id == job_id:
-                removed_job = self.job_queue.pop(i)
-                
+        # Check queue: mark the entry cancelled and let the pop path skip it
+        # (lazy deletion avoids an O(n) heap rebuild)
+        for _, _, job in self.job_queue:
+            if job.job_id == job_id and job.status == JobStatus.QUEUED:
+                job.status = JobStatus.CANCELLED
+
                 await self.websocket_manager.broadcast({
                     "type": "job_removed",
                     "job_id": job_id,
-                    "queue_size": len(self.job_queue)
+                    "queue_size": self.get_queue_size()
                 })
-                
+
                 return True
                 
         # Check active jobs
         if job_id in self.active_jobs:
-            job = self.active_jobs[job_id]
-            job.status = JobStatus.CANCELLED
+            job, task = self.active_jobs[job_id]
+            if not task.done():
+                task.cancel()
             
             await self.websocket_manager.broadcast({
                 "type": "job_cancelled",
@@ -260,6 +305,14 @@ class PipelineManager:
             
         return False
     
+    def _pop_next_job(self) -> Optional[Job]:
+        """Pop the highest-priority queued job, skipping cancelled tombstones"""
+        while self.job_queue:
+            _, _, job = heapq.heappop(self.job_queue)
+            if job.status == JobStatus.QUEUED:
+                return job
+        return None
+
     async def _main_loop(self):
         """Main processing loop"""
         while self.status in [PipelineStatus.RUNNING, PipelineStatus.PAUSED]:
@@ -269,30 +322,21 @@ class PipelineManager:
                     await asyncio.sleep(1)
                     continue
                 
-                # Process jobs if there's capacity
-                if len(self.active_jobs) < self.max_concurrent_jobs and self.job_queue:
-                    job = self.job_queue.pop(0)
+                # Dispatch as many jobs as capacity allows
+                while len(self.active_jobs) < self.max_concurrent_jobs and self.job_queue:
+                    job = self._pop_next_job()
+                    if job is None:
+                        break
                     await self._start_job(job)
-                
-                # Clean up completed jobs
-                completed_job_ids = []
-                for job_id, job in self.active_jobs.items():
-                    if job.status in [JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED]:
-                        completed_job_ids.append(job_id)
-                
-                for job_id in completed_job_ids:
-                    completed_job = self.active_jobs.pop(job_id)
-                    self.completed_jobs.append(completed_job)
-                    
-                    # Update statistics
-                    if completed_job.status == JobStatus.COMPLETED:
-                        self.stats["jobs_processed"] += 1
-                        if completed_job.job_type == "upload_video":
-                            self.stats["videos_uploaded"] += 1
-                    elif completed_job.status == JobStatus.FAILED:
-                        self.stats["jobs_failed"] += 1
-                
-                await asyncio.sleep(1)
+
+                # Sleep until woken by add_job or a finished job; the timeout
+                # is only a safety net against missed wakeups
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=5.0)
+                except asyncio.TimeoutError:
+                    pass
+                finally:
+                    self._wake.clear()
                 
             except asyncio.CancelledError:
                 break
@@ -304,19 +348,19 @@ class PipelineManager:
         """Monitoring and status update loop"""
         while self.status in [PipelineStatus.RUNNING, PipelineStatus.PAUSED]:
             try:
-                # Send periodic status updates
-                await self.websocket_manager.send_pipeline_status({
+                # Build one snapshot per tick: a single uptime computation and
+                # a shallow stats copy, so the broadcast never aliases the
+                # live stats dict
+                snapshot = {
                     "status": self.status.value,
-                    "queue_size": len(self.job_queue),
+                    "queue_size": self.get_queue_size(),
                     "active_jobs": len(self.active_jobs),
-                    "stats": self.stats,
-                    "uptime": self.get_uptime()
-                })
-                
-                # Update last activity
-                if self.job_queue or self.active_jobs:
-                    self.stats["last_activity"] = datetime.now().isoformat()
-                
+                    "stats": dict(self.stats),
+                    "uptime": (time.monotonic() - self._started_monotonic)
+                              if self.status == PipelineStatus.RUNNING else None
+                }
+                await self.websocket_manager.send_pipeline_status(snapshot)
+
                 await asyncio.sleep(5)  # Update every 5 seconds
                 
             except asyncio.CancelledError:
@@ -328,18 +372,43 @@ class PipelineManager:
     async def _start_job(self, job: Job):
         """Start processing a job"""
         job.status = JobStatus.PROCESSING
-        job.started_at = datetime.now()
-        self.active_jobs[job.job_id] = job
-        
+        job.started_at = now_ms()
+        self.stats["last_activity"] = job.started_at
+
         # Notify job started
         await self.websocket_manager.broadcast({
             "type": "job_started",
             "job": job.to_dict()
         })
-        
-        # Create task for job processing
+
+        # Create task for job processing; cleanup runs from the done-callback
+        # as soon as the coroutine finishes instead of waiting for a poll tick
         task = asyncio.create_task(self._process_job(job))
-        
+        self.active_jobs[job.job_id] = (job, task)
+        task.add_done_callback(lambda t, jid=job.job_id: self._on_job_done(jid))
+
+    def _on_job_done(self, job_id: str):
+        """Move a finished job out of active_jobs and update statistics"""
+        entry = self.active_jobs.pop(job_id, None)
+        if entry is None:
+            return
+        job, _task = entry
+        if len(self.completed_jobs) == self.completed_jobs.maxlen:
+            self.stats["completed_evicted"] += 1
+        self.completed_jobs.append(job)
+
+        # Update statistics
+        if job.status == JobStatus.COMPLETED:
+            self.stats["jobs_processed"] += 1
+            if job.job_type == "upload_video":
+                self.stats["videos_uploaded"] += 1
+        elif job.status == JobStatus.FAILED:
+            self.stats["jobs_failed"] += 1
+
+        # A slot just freed up — wake the dispatcher
+        self._wake.set()
+        self.stats["last_activity"] = now_ms()
+
     async def _process_job(self, job: Job):
         """Process a specific job"""
         try:
@@ -353,12 +422,17 @@ class PipelineManager:
                 raise ValueError(f"Unknown job type: {job.job_type}")
                 
             job.status = JobStatus.COMPLETED
-            job.completed_at = datetime.now()
-            
+            job.completed_at = now_ms()
+
+        except asyncio.CancelledError:
+            job.status = JobStatus.CANCELLED
+            job.completed_at = now_ms()
+            raise
+
         except Exception as e:
             job.status = JobStatus.FAILED
             job.error_message = str(e)
-            job.completed_at = datetime.now()
+            job.completed_at = now_ms()
             
             print(f"Job {job.job_id} failed: {e}")
             
@@ -368,11 +442,17 @@ class PipelineManager:
                 {"job_id": job.job_id, "job_type": job.job_type}
             )
         
-        # Notify job completed
-        await self.websocket_manager.broadcast({
+        # Notify job completed on a separate task: the terminal state is
+        # already recorded above, so the coroutine can finish (and the
+        # done-callback free the capacity slot) without waiting on WS
+        # delivery. Kept in _broadcast_tasks until done so it can't be
+        # garbage-collected before it runs.
+        task = asyncio.create_task(self.websocket_manager.broadcast({
             "type": "job_completed",
             "job": job.to_dict()
-        })
+        }))
+        self._broadcast_tasks.add(task)
+        task.add_done_callback(self._broadcast_tasks.discard)
     
     async def _process_video_generation(self, job: Job):
         """Process video generation job (placeholder for Sora AI integration)"""
@@ -406,17 +486,20 @@ class PipelineManager:
         if not file_path or not Path(file_path).exists():
             raise ValueError(f"Video file not found: {file_path}")
         
-        # Upload video using existing uploader
-        result = self.video_uploader.upload_video(
+        # Upload video using existing uploader. The uploader is synchronous
+        # blocking HTTP, so run it on a worker thread — otherwise a slow
+        # upload stalls the whole event loop (WS sends, job dispatch)
+        result = await asyncio.to_thread(
+            self.video_uploader.upload_video,
             file_path,
             job.data.get("metadata")
         )
-        
+
         if result and result.get("success"):
             job.result = result
-            
+
             # Move file to processed folder
-            self.video_uploader.move_processed_file(file_path)
+            await asyncio.to_thread(self.video_uploader.move_processed_file, file_path)
             
             # Notify upload success
             await self.websocket_manager.send_video_update(video_id, {
@@ -452,29 +535,35 @@ class PipelineManager:
         return self.status.value
     
     def get_queue_size(self) -> int:
-        return len(self.job_queue)
+        return sum(1 for _, _, job in self.job_queue if job.status == JobStatus.QUEUED)
     
     def get_active_jobs(self) -> List[Dict[str, Any]]:
-        return [job.to_dict() for job in self.active_jobs.values()]
+        return [job.to_dict() for job, _task in self.active_jobs.values()]
     
     def get_queue(self) -> List[Dict[str, Any]]:
-        return [job.to_dict() for job in self.job_queue]
+        return [
+            job.to_dict()
+            for _, _, job in sorted(self.job_queue)
+            if job.status == JobStatus.QUEUED
+        ]
     
     def get_stats(self) -> Dict[str, Any]:
         return self.stats.copy()
     
     def get_last_activity(self) -> Optional[str]:
-        return self.stats.get("last_activity")
+        return _to_iso(self.stats.get("last_activity"))
     
     def get_uptime(self) -> Optional[float]:
-        if self.started_at and self.status == PipelineStatus.RUNNING:
-            return (datetime.now() - self.started_at).total_seconds()
+        if self._started_monotonic is not None and self.status == PipelineStatus.RUNNING:
+            return time.monotonic() - self._started_monotonic
         return None
     
     def get_config(self) -> Dict[str, Any]:
         return self.config_manager.config
     
+    @functools.lru_cache(maxsize=1)
     def get_default_config(self) -> Dict[str, Any]:
+        # Defaults never change at runtime, so build the dict once per process
         return self.config_manager.get_default_config()
     
     async def update_config(self, config: Dict[str, Any]):
@@ -497,9 +586,9 @@ class PipelineManager:
         """Test pipeline components"""
         results = {}
         
-        # Test YouTube API
+        # Test YouTube API (blocking network call — keep it off the loop)
         try:
-            youtube_test = self.video_uploader.youtube_api.test_connection()
+            youtube_test = await asyncio.to_thread(self.video_uploader.youtube_api.test_connection)
             results["youtube_api"] = {"status": "success" if youtube_test else "failed"}
         except Exception as e:
             results["youtube_api"] = {"status": "error", "error": str(e)}
@@ -4,208 +4,364 @@ WebSocket Manager for Real-time Updates
 
 import json
 import asyncio
+import time
+import orjson
+from collections import defaultdict
 from typing import Dict, Set, List, Any
-from datetime import datetime
 from fastapi import WebSocket, WebSocketDisconnect
 
+def now_ms() -> int:
+    """Current Unix time in milliseconds — the wire format for WS timestamps.
+
+    A single time.time() call beats building and formatting a datetime for
+    every message, and the int is smaller on the wire than an ISO string.
+    """
+    return int(time.time() * 1000)
+
 class WebSocketManager:
     """Manages WebSocket connections and real-time updates"""
-    
+
+    # Batching window for outbound messages. Messages queued within this
+    # window are coalesced into a single frame, so bursty pipeline updates
+    # cost one TCP write per connection instead of one per message.
+    FLUSH_WINDOW = 0.01  # seconds
+
+    # Caps per batch frame so one flush can't produce an arbitrarily large
+    # write: at most this many messages and roughly this many payload bytes
+    # per envelope; anything beyond rolls into the next frame.
+    BATCH_MAX_MESSAGES = 128
+    BATCH_MAX_BYTES = 64 * 1024
+
+    # Fan-out chunk size: yield to the event loop between chunks so large
+    # broadcasts don't stall other tasks (job dispatch, HTTP handlers).
+    FANOUT_CHUNK = 50
+
+    # Progress coalescing: drop an update when it moved less than this many
+    # percent AND arrived within this many seconds of the last one sent.
+    PROGRESS_MIN_DELTA = 1.0
+    PROGRESS_MIN_INTERVAL = 0.1
+
     def __init__(self):
-        # Store active connections
+        # Store active connections. The set answers membership checks; the
+        # list mirror is what broadcasts iterate, so the hot path avoids
+        # allocating a fresh set copy per message.
         self.connections: Set[WebSocket] = set()
-        
-        # Channel subscriptions
-        self.subscriptions: Dict[str, Set[WebSocket]] = {}
-        
+        self._connections_list: List[WebSocket] = []
+
+        # Channel subscriptions (set for membership, list mirror for fan-out)
+        self.subscriptions: Dict[str, Set[WebSocket]] = defaultdict(set)
+        self._sub_lists: Dict[str, List[WebSocket]] = {}
+
         # Connection metadata
         self.connection_info: Dict[WebSocket, Dict[str, Any]] = {}
-        
+
+        # Per-connection outbound queues drained by background writer tasks.
+        # Queued entries are orjson-encoded bytes so a broadcast serializes
+        # the message once instead of once per subscriber.
+        self._outbox: Dict[WebSocket, List[bytes]] = {}
+        self._flush_event: Dict[WebSocket, asyncio.Event] = {}
+        self._writer_tasks: Dict[WebSocket, asyncio.Task] = {}
+
+        # (channel, video_id) -> (last_sent_pct, last_sent_monotonic) used to
+        # coalesce high-frequency progress updates
+        self._last_progress: Dict[tuple, tuple] = {}
+
     async def connect(self, websocket: WebSocket):
         """Accept a new WebSocket connection"""
         await websocket.accept()
         self.connections.add(websocket)
-        
-        # Store connection info
+        self._connections_list.append(websocket)
+
+        # Store connection info (one clock sample for both fields)
+        now = time.time()
         self.connection_info[websocket] = {
-            "connected_at": datetime.now(),
-            "last_activity": datetime.now(),
+            "connected_at": now,
+            "last_activity": now,
             "subscriptions": set()
         }
-        
+
+        # Set up the outbound queue and start the writer task for this connection
+        self._outbox[websocket] = []
+        self._flush_event[websocket] = asyncio.Event()
+        self._writer_tasks[websocket] = asyncio.create_task(self._writer(websocket))
+
         # Send welcome message
         await self.send_personal_message(websocket, {
             "type": "connection",
             "status": "connected",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": int(now * 1000),
             "message": "Connected to YouTube Automation Pipeline"
         })
-        
+
         print(f"WebSocket connected. Total connections: {len(self.connections)}")
-    
+
     def disconnect(self, websocket: WebSocket):
         """Remove a WebSocket connection"""
         if websocket in self.connections:
             self.connections.remove(websocket)
-            
-            # Remove from all subscriptions
+            try:
+                self._connections_list.remove(websocket)
+            except ValueError:
+                pass
+
+            # Stop the writer task and drop any undelivered messages
+            writer = self._writer_tasks.pop(websocket, None)
+            if writer is not None and not writer.done():
+                writer.cancel()
+            self._outbox.pop(websocket, None)
+            self._flush_event.pop(websocket, None)
+
+            # Remove from the channels this connection was subscribed to,
+            # dropping channels that became empty in the same pass — no scan
+            # over unrelated channels
             if websocket in self.connection_info:
                 subscriptions = self.connection_info[websocket].get("subscriptions", set())
                 for channel in subscriptions:
-                    if channel in self.subscriptions:
-                        self.subscriptions[channel].discard(websocket)
-                        
-                # Clean up empty channels
-                empty_channels = [
-                    channel for channel, subs in self.subscriptions.items() 
-                    if not subs
-                ]
-                for channel in empty_channels:
-                    del self.subscriptions[channel]
-                    
+                    bucket = self.subscriptions.get(channel)
+                    if bucket is None:
+                        continue
+                    bucket.discard(websocket)
+                    self._remove_from_sub_list(channel, websocket)
+                    if not bucket:
+                        self.subscriptions.pop(channel, None)
+                        self._sub_lists.pop(channel, None)
+
                 # Remove connection info
                 del self.connection_info[websocket]
-                
+
         print(f"WebSocket disconnected. Total connections: {len(self.connections)}")
-    
+
+    @staticmethod
+    async def _send_raw(websocket: WebSocket, payload: bytes):
+        """Single send site for encoded frames — no per-send error handling.
+
+        Failures propagate to the writer task's one structured handler, which
+        disconnects the client; each connection has its own writer, so sends
+        to different clients already run concurrently and one slow client
+        never extends another's broadcast latency.
+
+        Sent as a text frame: the browser client JSON-parses event.data
+        directly, and a binary frame would arrive as a Blob instead.
+        """
+        await websocket.send_text(payload.decode())
+
+    def _remove_from_sub_list(self, channel: str, websocket: WebSocket):
+        """Drop a connection from a channel's list mirror"""
+        sub_list = self._sub_lists.get(channel)
+        if sub_list is not None:
+            try:
+                sub_list.remove(websocket)
+            except ValueError:
+                pass
+
+    def _enqueue(self, websocket: WebSocket, payload: bytes):
+        """Queue an encoded message for delivery by the connection's writer task"""
+        outbox = self._outbox.get(websocket)
+        if outbox is None:
+            return
+        outbox.append(payload)
+        self._flush_event[websocket].set()
+
+    async def _writer(self, websocket: WebSocket):
+        """Drain the outbound queue for one connection.
+
+        Waits for messages, then sleeps for the flush window so that bursts
+        coalesce. A lone message goes out as-is; bursts are wrapped in a
+        typed {"type": "batch", "messages": [...]} envelope the client
+        dispatches on, split into frames of at most BATCH_MAX_MESSAGES
+        messages / BATCH_MAX_BYTES payload bytes.
+        """
+        try:
+            while True:
+                event = self._flush_event.get(websocket)
+                if event is None:
+                    break
+                await event.wait()
+                await asyncio.sleep(self.FLUSH_WINDOW)
+                event.clear()
+
+                payloads = self._outbox.get(websocket)
+                if not payloads:
+                    continue
+                self._outbox[websocket] = []
+
+                start = 0
+                while start < len(payloads):
+                    # Grow the frame until either cap is hit (always taking
+                    # at least one message so oversize payloads still go out)
+                    end = start + 1
+                    frame_bytes = len(payloads[start])
+                    while (end < len(payloads)
+                           and end - start < self.BATCH_MAX_MESSAGES
+                           and frame_bytes + len(payloads[end]) <= self.BATCH_MAX_BYTES):
+                        frame_bytes += len(payloads[end])
+                        end += 1
+
+                    if end - start == 1:
+                        await self._send_raw(websocket, payloads[start])
+                    else:
+                        await self._send_raw(
+                            websocket,
+                            b'{"type":"batch","messages":['
+                            + b",".join(payloads[start:end]) + b"]}"
+                        )
+                    start = end
+
+                # Update last activity
+                if websocket in self.connection_info:
+                    self.connection_info[websocket]["last_activity"] = time.time()
+
+        except asyncio.CancelledError:
+            pass
+        except WebSocketDisconnect:
+            self.disconnect(websocket)
+        except Exception as e:
+            print(f"Error writing to websocket: {e}")
+            self.disconnect(websocket)
+
+    async def _fanout(self, targets: List[WebSocket], payload: bytes):
+        """Queue an encoded message for many connections, yielding between chunks.
+
+        Small fan-outs (<= FANOUT_CHUNK) run in one pass with no yield to
+        preserve latency; larger ones hand control back to the event loop
+        between chunks so fan-out stays O(chunk) per scheduling slice.
+        """
+        if len(targets) <= self.FANOUT_CHUNK:
+            for websocket in targets:
+                self._enqueue(websocket, payload)
+            return
+
+        for i in range(0, len(targets), self.FANOUT_CHUNK):
+            for websocket in targets[i:i + self.FANOUT_CHUNK]:
+                self._enqueue(websocket, payload)
+            await asyncio.sleep(0)
+
     async def subscribe(self, websocket: WebSocket, channel: str):
         """Subscribe a connection to a specific channel"""
-        if channel not in self.subscriptions:
-            self.subscriptions[channel] = set()
-            
-        self.subscriptions[channel].add(websocket)
-        
+        bucket = self.subscriptions[channel]
+        if websocket not in bucket:
+            bucket.add(websocket)
+            self._sub_lists.setdefault(channel, []).append(websocket)
+
         # Update connection info
         if websocket in self.connection_info:
             self.connection_info[websocket]["subscriptions"].add(channel)
-            
+
         await self.send_personal_message(websocket, {
             "type": "subscription",
             "channel": channel,
             "status": "subscribed",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now_ms()
         })
-        
+
         print(f"WebSocket subscribed to channel '{channel}'. Channel subscribers: {len(self.subscriptions[channel])}")
-    
+
     async def unsubscribe(self, websocket: WebSocket, channel: str):
         """Unsubscribe a connection from a channel"""
         if channel in self.subscriptions:
             self.subscriptions[channel].discard(websocket)
-            
+            self._remove_from_sub_list(channel, websocket)
+
             # Update connection info
             if websocket in self.connection_info:
                 self.connection_info[websocket]["subscriptions"].discard(channel)
-                
+
             # Clean up empty channel
             if not self.subscriptions[channel]:
                 del self.subscriptions[channel]
-                
+                self._sub_lists.pop(channel, None)
+
         await self.send_personal_message(websocket, {
-            "type": "subscription", 
+            "type": "subscription",
             "channel": channel,
             "status": "unsubscribed",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now_ms()
         })
-    
+
     async def send_personal_message(self, websocket: WebSocket, message: Dict[str, Any]):
         """Send message to a specific WebSocket connection"""
-        try:
-            if websocket in self.connections:
-                await websocket.send_json(message)
-                
-                # Update last activity
-                if websocket in self.connection_info:
-                    self.connection_info[websocket]["last_activity"] = datetime.now()
-                    
-        except WebSocketDisconnect:
-            self.disconnect(websocket)
-        except Exception as e:
-            print(f"Error sending personal message: {e}")
-            self.disconnect(websocket)
-    
+        if websocket in self.connections:
+            self._enqueue(websocket, orjson.dumps(message))
+
     async def broadcast(self, message: Dict[str, Any]):
         """Broadcast message to all connected clients"""
         if not self.connections:
             return
-            
-        # Add timestamp if not present
+
+        # Build the outgoing dict without mutating the caller's message
         if "timestamp" not in message:
-            message["timestamp"] = datetime.now().isoformat()
-            
-        # Send to all connections
-        disconnected = set()
-        
-        for websocket in self.connections.copy():
-            try:
-                await websocket.send_json(message)
-                
-                # Update last activity
-                if websocket in self.connection_info:
-                    self.connection_info[websocket]["last_activity"] = datetime.now()
-                    
-            except WebSocketDisconnect:
-                disconnected.add(websocket)
-            except Exception as e:
-                print(f"Error broadcasting to websocket: {e}")
-                disconnected.add(websocket)
-        
-        # Clean up disconnected websockets
-        for websocket in disconnected:
-            self.disconnect(websocket)
-    
+            message = {**message, "timestamp": now_ms()}
+
+        # Serialize once, queue for every connection; writer tasks deliver.
+        # The list mirror is iterated directly — no per-broadcast copy.
+        await self._fanout(self._connections_list, orjson.dumps(message))
+
     async def broadcast_to_channel(self, channel: str, message: Dict[str, Any]):
         """Broadcast message to all subscribers of a specific channel"""
-        if channel not in self.subscriptions:
+        if not self.subscriptions.get(channel):
             return
-            
-        # Add timestamp and channel info
-        message.update({
-            "timestamp": datetime.now().isoformat(),
+
+        # Build the outgoing dict once — mutating the caller's message would
+        # leak the stamped timestamp/channel back across repeated broadcasts
+        outgoing = {
+            **message,
+            "timestamp": now_ms(),
             "channel": channel
-        })
-        
-        disconnected = set()
-        subscribers = self.subscriptions[channel].copy()
-        
-        for websocket in subscribers:
-            try:
-                await websocket.send_json(message)
-                
-                # Update last activity
-                if websocket in self.connection_info:
-                    self.connection_info[websocket]["last_activity"] = datetime.now()
-                    
-            except WebSocketDisconnect:
-                disconnected.add(websocket)
-            except Exception as e:
-                print(f"Error broadcasting to channel subscriber: {e}")
-                disconnected.add(websocket)
-        
-        # Clean up disconnected websockets
-        for websocket in disconnected:
-            self.disconnect(websocket)
-    
+        }
+
+        await self._fanout(self._sub_lists.get(channel, []), orjson.dumps(outgoing))
+
     # Convenience methods for different message types
     async def send_pipeline_status(self, status: Dict[str, Any]):
         """Send pipeline status update"""
+        if not self.subscriptions.get("pipeline"):
+            return
         message = {
             "type": "pipeline_status",
             "data": status
         }
         await self.broadcast_to_channel("pipeline", message)
-    
+
     async def send_video_update(self, video_id: int, video_data: Dict[str, Any]):
         """Send video status update"""
+        if not self.subscriptions.get("videos"):
+            return
         message = {
             "type": "video_update",
             "video_id": video_id,
             "data": video_data
         }
         await self.broadcast_to_channel("videos", message)
-    
+
+    def _should_send_progress(self, channel: str, video_id: int, progress: float, status: str) -> bool:
+        """Rate-limit progress updates per video.
+
+        Terminal updates (100% or a non-default status) always go out;
+        intermediate ones are dropped when they changed by less than
+        PROGRESS_MIN_DELTA percent within PROGRESS_MIN_INTERVAL seconds,
+        bounding the emission rate regardless of how often callers report.
+        """
+        key = (channel, video_id)
+        if progress >= 100 or status not in ("generating", "uploading"):
+            self._last_progress.pop(key, None)
+            return True
+
+        now = time.monotonic()
+        last = self._last_progress.get(key)
+        if last is not None:
+            last_pct, last_ts = last
+            if abs(progress - last_pct) < self.PROGRESS_MIN_DELTA and (now - last_ts) < self.PROGRESS_MIN_INTERVAL:
+                return False
+
+        self._last_progress[key] = (progress, now)
+        return True
+
     async def send_upload_progress(self, video_id: int, progress: float, status: str = "uploading"):
         """Send upload progress update"""
+        if not self.subscriptions.get("uploads"):
+            return
+        if not self._should_send_progress("uploads", video_id, progress, status):
+            return
         message = {
             "type": "upload_progress",
             "video_id": video_id,
@@ -213,9 +369,13 @@ class WebSocketManager:
             "status": status
         }
         await self.broadcast_to_channel("uploads", message)
-    
+
     async def send_generation_progress(self, video_id: int, progress: float, status: str = "generating"):
         """Send video generation progress update"""
+        if not self.subscriptions.get("generation"):
+            return
+        if not self._should_send_progress("generation", video_id, progress, status):
+            return
         message = {
             "type": "generation_progress",
             "video_id": video_id,
@@ -223,7 +383,7 @@ class WebSocketManager:
             "status": status
         }
         await self.broadcast_to_channel("generation", message)
-    
+
     async def send_error(self, error_type: str, message: str, details: Dict[str, Any] = None):
         """Send error notification"""
         error_message = {
@@ -233,7 +393,7 @@ class WebSocketManager:
             "details": details or {}
         }
         await self.broadcast(error_message)
-    
+
     async def send_notification(self, title: str, message: str, level: str = "info"):
         """Send general notification"""
         notification = {
@@ -243,22 +403,22 @@ class WebSocketManager:
             "level": level  # info, warning, error, success
         }
         await self.broadcast(notification)
-    
+
     # Statistics and monitoring
     def get_connection_count(self) -> int:
         """Get number of active connections"""
         return len(self.connections)
-    
+
     def get_channel_subscribers(self, channel: str) -> int:
         """Get number of subscribers for a channel"""
         return len(self.subscriptions.get(channel, set()))
-    
+
     def get_connection_stats(self) -> Dict[str, Any]:
         """Get connection statistics"""
         return {
             "total_connections": len(self.connections),
             "channels": {
-                channel: len(subscribers) 
+                channel: len(subscribers)
                 for channel, subscribers in self.subscriptions.items()
             },
             "active_channels": len(self.subscriptions)
@@ -272,4 +432,4 @@ def get_websocket_manager() -> WebSocketManager:
     global _websocket_manager
     if _websocket_manager is None:
         _websocket_manager = WebSocketManager()
-    return _websocket_manager
\ No newline at end of file
+    return _websocket_manager
@@ -2,32 +2,96 @@
 Database Connection Configuration
 """
 
+import functools
+import logging
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from typing import Generator, AsyncGenerator
+from typing import Any, Dict, Generator, AsyncGenerator, List
 import asyncio
 
+logger = logging.getLogger(__name__)
+
 # Database configuration
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./youtube_automation.db")
 ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", "sqlite+aiosqlite:///./youtube_automation.db")
 
+# Compiled-statement cache size. Explicit (and env-tunable) so the hot
+# Video/VideoAnalytics/Pipeline statements stay cached instead of being
+# recompiled when the default-sized cache churns.
+QUERY_CACHE_SIZE = int(os.getenv("SQLA_CACHE", 1200))
+
 # Create synchronous engine (for compatibility with existing code)
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {},
-    echo=False  # Set to True for SQL debugging
-)
+if "sqlite" in DATABASE_URL:
+    # SQLite doesn't benefit from a sized QueuePool, so keep the defaults
+    engine = create_engine(
+        DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        query_cache_size=QUERY_CACHE_SIZE,
+        echo=False  # Set to True for SQL debugging
+    )
+else:
+    # Env-tunable pool sizing: the SQLAlchemy defaults (pool_size=5,
+    # max_overflow=10) lock up under ~15 concurrent requests. pre_ping and
+    # recycle guard against stale connections after idle timeouts.
+    engine = create_engine(
+        DATABASE_URL,
+        pool_size=int(os.getenv("DB_POOL_SIZE", 20)),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", 30)),
+        pool_pre_ping=True,
+        pool_recycle=3600,
+        query_cache_size=QUERY_CACHE_SIZE,
+        echo=False  # Set to True for SQL debugging
+    )
 
 # Create asynchronous engine for FastAPI
-async_engine = create_async_engine(
-    ASYNC_DATABASE_URL,
-    echo=False  # Set to True for SQL debugging
-)
+if "sqlite" in ASYNC_DATABASE_URL:
+    # aiosqlite doesn't benefit from a sized QueuePool, so keep the defaults
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        query_cache_size=QUERY_CACHE_SIZE,
+        echo=False  # Set to True for SQL debugging
+    )
+else:
+    # Same pool rationale as the sync engine above; recycle at 30 minutes
+    # to stay under typical proxy/server idle timeouts
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        pool_size=int(os.getenv("DB_POOL_SIZE", 20)),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", 30)),
+        pool_pre_ping=True,
+        pool_recycle=1800,
+        query_cache_size=QUERY_CACHE_SIZE,
+        echo=False  # Set to True for SQL debugging
+    )
+
+# SQLite tuning: WAL lets readers run concurrently with the writer and
+# synchronous=NORMAL drops the per-commit fsync (safe in WAL mode), which
+# matters for the write-heavy logging/analytics pattern here. Applied on
+# every new DBAPI connection for both engines.
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.close()
+
+if "sqlite" in DATABASE_URL:
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+if "sqlite" in ASYNC_DATABASE_URL:
+    event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
 
 # Session makers
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False keeps loaded attributes valid after commit, so
+# post-commit to_dict() calls don't silently re-SELECT every row touched.
+# Deliberately NOT a scoped_session: FastAPI runs sync dependencies on
+# whichever anyio worker thread is free, so setup and teardown can land on
+# different threads and a thread-scoped registry would remove the wrong
+# session (or none). Sessions are cheap to construct; the pooled
+# connection is what's reused.
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, expire_on_commit=False)
 AsyncSessionLocal = async_sessionmaker(
     async_engine,
     class_=AsyncSession,
@@ -36,7 +100,7 @@ AsyncSessionLocal = async_sessionmaker(
 
 # Dependency for getting database session (sync)
 def get_database() -> Generator[Session, None, None]:
-    """Get synchronous database session"""
+    """Get a database session scoped to the current request"""
     db = SessionLocal()
     try:
         yield db
@@ -52,6 +116,95 @@ async def get_async_database() -> AsyncGenerator[AsyncSession, None]:
         finally:
             await session.close()
 
+# Query helpers
+async def list_videos_with_analytics(db: AsyncSession, limit: int = 50, offset: int = 0):
+    """List recent videos with analytics eagerly loaded.
+
+    The analytics relationship is lazy by default, so touching
+    video.analytics in a loop issues one SELECT per row (N+1);
+    selectinload fetches the whole page of analytics in a single
+    second query.
+    """
+    from sqlalchemy import select
+    from sqlalchemy.orm import selectinload
+    from .models import Video
+
+    stmt = (
+        select(Video)
+        .options(selectinload(Video.analytics))
+        .order_by(Video.created_at.desc())
+        .limit(limit)
+        .offset(offset)
+    )
+    result = await db.execute(stmt)
+    return result.scalars().all()
+
+def bulk_update_analytics(db: Session, rows: List[Dict[str, Any]]) -> int:
+    """Apply a batch of VideoAnalytics updates in one executemany round-trip.
+
+    Each dict needs the row's primary key ("id") plus the columns to set.
+    A poller refreshing counters for hundreds of videos issues a single
+    statement instead of one ORM flush and commit per row, and never
+    constructs ORM instances at all.
+    """
+    from sqlalchemy import update
+    from .models import VideoAnalytics
+
+    if not rows:
+        return 0
+    db.execute(update(VideoAnalytics), rows)
+    db.commit()
+    return len(rows)
+
+@functools.lru_cache(maxsize=512)
+def get_config(key: str):
+    """Read a Configuration value, cached process-wide.
+
+    Configuration rows change rarely, so the LRU cache turns repeated
+    reads into a dict lookup. Writes through the ORM clear the cache via
+    the events registered below.
+
+    Opens its own short-lived session rather than going through the
+    request factory, so calling it mid-request can never touch (or close)
+    the caller's session. Infrastructure-only for now: nothing reads the
+    Configuration table yet (the pipeline uses the file-based
+    ConfigManager); this is the accessor to use when something does.
+    """
+    from .models import Configuration
+
+    with Session(engine) as db:
+        row = db.query(Configuration).filter_by(key=key).first()
+        return row.value if row else None
+
+def _clear_config_cache(*_args, **_kwargs):
+    get_config.cache_clear()
+
+def _register_config_cache_events():
+    from .models import Configuration
+
+    for event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(Configuration, event_name, _clear_config_cache)
+
+_register_config_cache_events()
+
+def get_by_id_cached(db, request, model, pk):
+    """Fetch a row by primary key, memoized for the current request.
+
+    Routes that touch the same row more than once per request (permission
+    check, then detail, then analytics) hit the request-local dict on
+    repeat lookups instead of the database. Scoping the cache to the
+    request avoids the invalidation problems of a global object cache.
+    """
+    cache = getattr(request.state, "obj_cache", None)
+    if cache is None:
+        cache = {}
+        request.state.obj_cache = cache
+
+    key = (model.__name__, pk)
+    if key not in cache:
+        cache[key] = db.get(model, pk)
+    return cache[key]
+
 # Database utilities
 class DatabaseManager:
     """Database management utilities"""
@@ -59,15 +212,18 @@ class DatabaseManager:
     @staticmethod
     def create_tables():
         """Create all database tables (sync)"""
-        from .models import Base
+        from .models import Base, migrate_schema
         Base.metadata.create_all(bind=engine)
-    
+        with engine.begin() as conn:
+            migrate_schema(conn)
+
     @staticmethod
     async def create_tables_async():
         """Create all database tables (async)"""
-        from .models import Base
+        from .models import Base, migrate_schema
         async with async_engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(migrate_schema)
     
     @staticmethod
     def drop_tables():
@@ -99,42 +255,41 @@ def test_connection() -> bool:
     """Test database connection"""
     try:
         with engine.connect() as conn:
-            result = conn.execute("SELECT 1")
-            return result.fetchone()[0] == 1
+            return conn.execute(text("SELECT 1")).scalar() == 1
     except Exception as e:
-        print(f"Database connection test failed: {e}")
+        logger.error("Database connection test failed: %s", e)
         return False
 
 async def test_async_connection() -> bool:
     """Test async database connection"""
     try:
         async with async_engine.connect() as conn:
-            result = await conn.execute("SELECT 1")
-            row = result.fetchone()
-            return row[0] == 1
+            result = await conn.execute(text("SELECT 1"))
+            return result.scalar() == 1
     except Exception as e:
-        print(f"Async database connection test failed: {e}")
+        logger.error("Async database connection test failed: %s", e)
         return False
 
-# Initialize database on import
+# Explicit database initialization (run via `python connection.py` or called
+# from application startup — never at import time)
 def init_database():
     """Initialize database with default configuration"""
     try:
         # Test connection
         if test_connection():
-            print(f"Database connected successfully: {DATABASE_URL}")
-            
+            logger.info("Database connected successfully: %s", DATABASE_URL)
+
             # Create tables
             DatabaseManager.create_tables()
-            print("Database tables created/verified")
-            
+            logger.info("Database tables created/verified")
+
             return True
         else:
-            print("Database connection failed")
+            logger.error("Database connection failed")
             return False
-            
+
     except Exception as e:
-        print(f"Database initialization error: {e}")
+        logger.error("Database initialization error: %s", e)
         return False
 
 # Export main components
@@ -145,6 +300,10 @@ __all__ = [
     "AsyncSessionLocal",
     "get_database",
     "get_async_database",
+    "list_videos_with_analytics",
+    "bulk_update_analytics",
+    "get_config",
+    "get_by_id_cached",
     "DatabaseManager",
     "test_connection",
     "test_async_connection",
@@ -153,8 +312,9 @@ __all__ = [
 
 if __name__ == "__main__":
     # Test database connection when run directly
-    print("Testing database connection...")
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+    logger.info("Testing database connection...")
     if init_database():
-        print("✅ Database setup successful!")
+        logger.info("✅ Database setup successful!")
     else:
-        print("❌ Database setup failed!")
\ No newline at end of file
+        logger.error("❌ Database setup failed!")
\ No newline at end of file
@@ -2,7 +2,7 @@
 Database Models for YouTube Automation Pipeline
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Float, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Float, JSON, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -40,6 +40,7 @@ class Video(Base):
     filename = Column(String(255), nullable=False)
     file_path = Column(String(500))
     file_size = Column(Integer)  # in bytes
+    content_hash = Column(String(128), unique=True, index=True)  # blake2b of file bytes
     duration = Column(Float)  # in seconds
     
     # Generation info
@@ -50,7 +51,7 @@ class Video(Base):
     # Upload info
     youtube_video_id = Column(String(20), unique=True, index=True)
     youtube_url = Column(String(255))
-    upload_status = Column(String(20), default=UploadStatus.QUEUED.value)
+    upload_status = Column(String(20), default=UploadStatus.QUEUED.value, index=True)
     
     # Status and tracking
     status = Column(String(20), default=VideoStatus.PENDING.value)
@@ -58,15 +59,26 @@ class Video(Base):
     error_message = Column(Text)
     
     # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     generated_at = Column(DateTime(timezone=True))
     uploaded_at = Column(DateTime(timezone=True))
-    
+
     # Analytics
     analytics = relationship("VideoAnalytics", back_populates="video", uselist=False)
-    
+
+    # Indexes matching the list/stats query patterns: status-filtered lists
+    # ordered by created_at, and the recent-uploads range scan. The
+    # youtube_video_id lookups are already covered by its unique index.
+    __table_args__ = (
+        Index("ix_videos_status_created_at", "status", "created_at"),
+        Index("ix_videos_uploaded_at", "uploaded_at"),
+    )
+
     def to_dict(self):
+        # Datetimes are returned as-is: every app serves responses through
+        # ORJSONResponse, which formats them to ISO-8601 in C — far cheaper
+        # than per-row Python isoformat() calls on large listings
         return {
             "id": self.id,
             "uuid": self.uuid,
@@ -83,10 +95,10 @@ class Video(Base):
             "upload_status": self.upload_status,
             "progress": self.progress,
             "error_message": self.error_message,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-            "generated_at": self.generated_at.isoformat() if self.generated_at else None,
-            "uploaded_at": self.uploaded_at.isoformat() if self.uploaded_at else None,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "generated_at": self.generated_at,
+            "uploaded_at": self.uploaded_at,
         }
 
 class VideoAnalytics(Base):
@@ -163,7 +175,7 @@ class SystemLog(Base):
     __tablename__ = "system_logs"
     
     id = Column(Integer, primary_key=True, index=True)
-    level = Column(String(20), nullable=False)  # INFO, WARNING, ERROR, DEBUG
+    level = Column(String(20), nullable=False, index=True)  # INFO, WARNING, ERROR, DEBUG
     message = Column(Text, nullable=False)
     component = Column(String(100))  # pipeline, uploader, generator, etc.
     
@@ -172,8 +184,8 @@ class SystemLog(Base):
     extra_data = Column(JSON)
     
     # Timestamp
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
-    
+    timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -182,7 +194,7 @@ class SystemLog(Base):
             "component": self.component,
             "video_id": self.video_id,
             "extra_data": self.extra_data,
-            "timestamp": self.timestamp.isoformat() if self.timestamp else None
+            "timestamp": self.timestamp
         }
 
 class PromptTemplate(Base):
@@ -207,18 +219,41 @@ class PromptTemplate(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+def migrate_schema(conn):
+    """Apply additive schema changes create_all won't make.
+
+    create_all only creates missing tables - it never ALTERs an existing
+    one, so columns and indexes added after a deployment's first run have
+    to be applied here or every ORM SELECT against the old schema fails.
+    """
+    from sqlalchemy import inspect, text
+
+    inspector = inspect(conn)
+    if not inspector.has_table("videos"):
+        return
+
+    columns = {col["name"] for col in inspector.get_columns("videos")}
+    if "content_hash" not in columns:
+        # SQLite can't ADD COLUMN with UNIQUE; the unique index created
+        # below enforces it instead (NULLs are exempt on every backend)
+        conn.execute(text("ALTER TABLE videos ADD COLUMN content_hash VARCHAR(128)"))
+
+    existing_indexes = {ix["name"] for ix in inspector.get_indexes("videos")}
+    for index in Video.__table__.indexes:
+        if index.name not in existing_indexes:
+            index.create(conn, checkfirst=True)
+
 # Initialize database
 async def init_db():
     """Initialize database tables"""
-    from .connection import engine
-    
-    # Import all models to ensure they're registered
-    import sys
-    current_module = sys.modules[__name__]
-    
-    # Create all tables
-    Base.metadata.create_all(bind=engine)
-    
+    from .connection import async_engine
+
+    # Run the sync create_all on the async engine's connection so startup
+    # doesn't block the event loop while tables are created
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(migrate_schema)
+
     print("Database initialized successfully!")
 
 # Export models
@@ -232,5 +267,6 @@ __all__ = [
     "PromptTemplate",
     "VideoStatus",
     "UploadStatus",
+    "migrate_schema",
     "init_db"
 ]
\ No newline at end of file
@@ -5,16 +5,27 @@ Main application entry point
 
 from fastapi import FastAPI, HTTPException, Depends, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 import uvicorn
 import json
 import asyncio
+import logging
 from typing import List, Dict, Any
 from datetime import datetime
 import os
 import sys
 
+# One-time logging setup for the whole backend: level-filtered, buffered
+# handlers instead of unconditional print() calls on the hot paths
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+logger = logging.getLogger(__name__)
+
 # Add parent directory to path for importing automation modules
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
@@ -42,9 +53,14 @@ app = FastAPI(
     title="YouTube Automation Pipeline",
     description="AI-powered video generation and YouTube upload automation",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
+# Compress JSON responses above 1KB; the listing payloads are highly
+# repetitive and shrink severalfold on the wire
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # CORS middleware for React frontend
 app.add_middleware(
     CORSMiddleware,
@@ -79,7 +95,7 @@ async def websocket_endpoint(websocket: WebSocket):
     except WebSocketDisconnect:
         websocket_manager.disconnect(websocket)
     except Exception as e:
-        print(f"WebSocket error: {e}")
+        logger.warning("WebSocket error: %s", e)
         websocket_manager.disconnect(websocket)
 
 # Health check endpoint
@@ -113,5 +129,13 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=True,
-        log_level="info"
+        log_level="info",
+        # uvloop's libuv-based event loop and the httptools C parser cut
+        # per-request overhead well below the stdlib asyncio/h11 defaults
+        loop="uvloop",
+        http="httptools",
+        # Negotiate permessage-deflate on WebSocket connections: the status
+        # and job frames are JSON with highly repetitive key names, which
+        # DEFLATE typically shrinks 30-70% on the wire
+        ws_per_message_deflate=True
     )
\ No newline at end of file
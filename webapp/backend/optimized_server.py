@@ -3,17 +3,28 @@ Simple FastAPI server for YouTube Automation Web App
 Optimized version with lazy loading
 """
 
+import asyncio
+import logging
 import os
 import sys
 from pathlib import Path
 from dotenv import load_dotenv
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
+import orjson
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 import json
 import traceback
+import uuid
+
+from sqlalchemy import select
+
+from database.connection import AsyncSessionLocal
+from database.models import Video
 
 # Initialize directories quietly
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -24,8 +35,50 @@ os.makedirs(PROCESSED_DIR, exist_ok=True)
 # Load environment variables silently
 load_dotenv()
 
-# Basic app setup
-app = FastAPI()
+# Level-filtered, buffered logging instead of print() on the polling paths
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+logger = logging.getLogger(__name__)
+
+SORA_API_ENDPOINT = "https://api.openai.com/v1/sora/generations"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the shared API client once at startup and park it on app.state,
+    # matching main.py's lifespan pattern. This replaces the lazy global
+    # init, whose check-then-create could race under concurrent first
+    # requests and leak a second client.
+    import httpx
+
+    api_key = os.getenv('OPENAI_API_KEY')
+    if api_key:
+        # Retry logic plus a keep-alive pool so repeated Sora calls reuse
+        # warm TCP+TLS connections; HTTP/2 multiplexes the polls
+        app.state.ai_client = httpx.AsyncClient(
+            base_url="https://api.openai.com/v1",
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json"
+            },
+            transport=httpx.AsyncHTTPTransport(retries=3),
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+            http2=True,
+            timeout=60.0
+        )
+    else:
+        logger.error("OPENAI_API_KEY not found. Please set up your API key.")
+        app.state.ai_client = None
+
+    yield
+
+    # Close the client so pooled connections shut down cleanly
+    if app.state.ai_client is not None:
+        await app.state.ai_client.aclose()
+
+# Basic app setup; orjson serializes responses (including datetimes) in C
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
+
+# Compress JSON responses above 1KB
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 # Configure CORS
 app.add_middleware(
@@ -36,11 +89,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global variables for lazy loading
-ai_client = None
-OPENAI_API_KEY = None
-SORA_API_ENDPOINT = None
-videos_data = []
+# Latest Sora status per job, written by one background poller per job.
+# Serving reads from this cache keeps outbound polling at O(jobs) instead
+# of O(clients x jobs).
+job_status_cache: Dict[str, Dict[str, Any]] = {}
+POLL_INTERVAL = 2.0
+# Bound each poller: same 10-minute wall clock as simple_server's
+# generation timeout, plus a consecutive-error cap so a job whose id 404s
+# (expired, revoked key) doesn't poll for the process lifetime
+POLL_MAX_WAIT = 600.0
+POLL_MAX_ERRORS = 5
+
+# Strong references to fire-and-forget tasks: the event loop only holds a
+# weak ref, so a bare create_task result can be garbage-collected mid-flight
+_background_tasks: set = set()
+
+def _spawn(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+# In-flight status requests keyed by job_id: concurrent callers (poller,
+# prefetch, user-triggered refresh) await the same Future instead of each
+# issuing their own outbound poll
+_inflight_status: Dict[str, asyncio.Future] = {}
 
 # Custom exceptions
 class AIError(Exception):
@@ -57,37 +130,81 @@ class TimeoutError(AIError):
     def __init__(self, message: str = "Request timed out. Please try again."):
         super().__init__(message, status_code=504)
 
-# Lazy initialization function
-async def init_api_client():
-    global ai_client, OPENAI_API_KEY, SORA_API_ENDPOINT
-    
-    if ai_client is None:
+async def get_job_status(job_id: str, sora_id: str) -> Optional[Dict[str, Any]]:
+    """Fetch a job's Sora status, coalescing concurrent identical requests.
+
+    If a fetch for this job is already in flight, await its Future instead
+    of issuing another outbound call — a burst of N callers costs one poll.
+    Successful results land in job_status_cache.
+    """
+    existing = _inflight_status.get(job_id)
+    if existing is not None:
+        return await existing
+
+    fut = asyncio.get_running_loop().create_future()
+    _inflight_status[job_id] = fut
+    try:
+        response = await app.state.ai_client.get(f"/videos/{sora_id}")
+        status = response.json() if response.status_code == 200 else None
+        if status is not None:
+            job_status_cache[job_id] = status
+        fut.set_result(status)
+        return status
+    except Exception as e:
+        fut.set_exception(e)
+        raise
+    finally:
+        _inflight_status.pop(job_id, None)
+
+async def poll_job(job_id: str, sora_id: str):
+    """Poll Sora for one job until it reaches a terminal status.
+
+    Exactly one poller runs per job regardless of how many clients are
+    watching; readers get the latest status from job_status_cache. Gives
+    up after POLL_MAX_WAIT of wall clock or POLL_MAX_ERRORS consecutive
+    failed fetches so stuck jobs don't accumulate pollers forever.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + POLL_MAX_WAIT
+    errors = 0
+    while loop.time() < deadline:
+        await asyncio.sleep(POLL_INTERVAL)
         try:
-            import httpx
-            
-            # Configure OpenAI API
-            OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
-            if not OPENAI_API_KEY:
-                raise AIError("OPENAI_API_KEY not found. Please set up your API key.", status_code=500)
-                
-            # Configure Sora API endpoint
-            SORA_API_ENDPOINT = "https://api.openai.com/v1/sora/generations"
-            
-            # Configure API client with retry logic
-            transport = httpx.AsyncHTTPTransport(retries=3)
-            ai_client = httpx.AsyncClient(
-                base_url="https://api.openai.com/v1",
-                headers={
-                    "Authorization": f"Bearer {OPENAI_API_KEY}",
-                    "Content-Type": "application/json"
-                },
-                transport=transport,
-                timeout=60.0
-            )
-            return True
+            status = await get_job_status(job_id, sora_id)
+        except Exception as e:
+            errors += 1
+            logger.warning("Error polling job %s (%d/%d): %s",
+                           job_id, errors, POLL_MAX_ERRORS, e)
+            if errors >= POLL_MAX_ERRORS:
+                return
+            continue
+
+        if status is None:
+            errors += 1
+            if errors >= POLL_MAX_ERRORS:
+                logger.warning("Giving up on job %s after %d failed status fetches",
+                               job_id, errors)
+                return
+            continue
+
+        errors = 0
+        if status.get("status") in ("completed", "failed"):
+            return
+    logger.warning("Poller for job %s timed out after %.0f seconds", job_id, POLL_MAX_WAIT)
+
+async def prefetch_statuses(pairs: List[tuple]):
+    """Warm the status cache for in-flight jobs that were just listed.
+
+    Covers jobs whose poller isn't running (e.g. created before a restart):
+    the follow-up detail request then hits the cache instead of Sora.
+    """
+    for job_id, sora_id in pairs:
+        if not sora_id or job_id in job_status_cache:
+            continue
+        try:
+            await get_job_status(job_id, sora_id)
         except Exception as e:
-            print(f"Error initializing API client: {str(e)}")
-            return False
+            logger.warning("Error prefetching status for %s: %s", job_id, e)
 
 # API Models
 from enum import Enum
@@ -123,17 +240,58 @@ class GenerationRequest(BaseModel):
 
 # API Routes
 @app.get("/api/v1/videos/jobs")
-async def get_jobs():
-    """Get all video generation jobs"""
-    return {"jobs": videos_data}
+async def get_jobs(limit: int = 40, cursor: Optional[int] = None):
+    """Get video generation jobs, newest first, keyset-paginated.
+
+    Pass next_cursor from the previous page to fetch the one after it;
+    the response streams so large pages never buffer fully in memory.
+    """
+    limit = max(1, min(limit, 200))
+
+    stmt = select(Video).order_by(Video.id.desc()).limit(limit)
+    if cursor is not None:
+        stmt = stmt.where(Video.id < cursor)
+
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(stmt)
+        videos = result.scalars().all()
+
+    next_cursor = videos[-1].id if len(videos) == limit else None
+    # Merge the cached Sora status — no outbound polling on the read path
+    items = [
+        {**video.to_dict(), "sora_status": job_status_cache.get(video.uuid)}
+        for video in videos
+    ]
+
+    # Prefetch statuses for listed jobs that are still generating but have
+    # no cache entry, so the likely-next detail requests are warm
+    pending = [
+        (video.uuid,
+         (video.generation_parameters or {}).get("sora_response", {}).get("id"))
+        for video in videos
+        if video.status == "generating" and video.uuid not in job_status_cache
+    ]
+    if pending and getattr(app.state, "ai_client", None) is not None:
+        _spawn(prefetch_statuses(pending))
+
+    async def stream():
+        yield b'{"next_cursor":' + orjson.dumps(next_cursor) + b',"jobs":['
+        for i, item in enumerate(items):
+            if i:
+                yield b","
+            yield orjson.dumps(item)
+        yield b"]}"
+
+    return StreamingResponse(stream(), media_type="application/json")
 
 @app.post("/api/v1/videos/generate")
 async def generate_video(request: GenerationRequest):
     """Generate a video using Sora AI"""
     try:
-        # Initialize API client if needed
-        if not ai_client and not await init_api_client():
-            raise AIError("Failed to initialize API client. Please try again.", status_code=500)
+        # The client is created once in lifespan; None means no API key
+        ai_client = getattr(app.state, "ai_client", None)
+        if ai_client is None:
+            raise AIError("OPENAI_API_KEY not found. Please set up your API key.", status_code=500)
 
         # Generate prompt
         prompt = f"Create a {request.duration.value} {request.style.value} video in {request.orientation.value} format showing {request.base_prompt}"
@@ -149,21 +307,33 @@ async def generate_video(request: GenerationRequest):
                 raise AIError(f"Sora API error: {response.text}", status_code=response.status_code)
                 
             result = response.json()
-            
-            # Create job entry
-            job_id = f"job_{len(videos_data) + 1}"
-            job = {
-                "id": len(videos_data) + 1,
-                "job_id": job_id,
-                "status": "generating",
-                "prompt": prompt,
-                "style": request.style.value,
-                "created_at": datetime.now().isoformat(),
-                "result": result
-            }
-            videos_data.append(job)
-            
-            return {"success": True, "job_id": job_id}
+
+            # Persist the job: the old in-memory list raced on its length
+            # for IDs, grew unbounded, and was lost on restart
+            video_uuid = str(uuid.uuid4())
+            async with AsyncSessionLocal() as db:
+                video = Video(
+                    uuid=video_uuid,
+                    title=request.base_prompt[:255],
+                    filename=f"sora_{video_uuid}.mp4",
+                    prompt=prompt,
+                    ai_model="sora",
+                    status="generating",
+                    generation_parameters={
+                        "style": request.style.value,
+                        "sora_response": result
+                    }
+                )
+                db.add(video)
+                await db.commit()
+
+            # Start the background poller for this job
+            sora_id = result.get("id")
+            if sora_id:
+                job_status_cache[video_uuid] = result
+                _spawn(poll_job(video_uuid, sora_id))
+
+            return {"success": True, "job_id": video_uuid}
             
         except httpx.TimeoutException:
             raise TimeoutError()
@@ -179,4 +349,11 @@ async def generate_video(request: GenerationRequest):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("optimized_server:app", host="0.0.0.0", port=8005, reload=True)
\ No newline at end of file
+    uvicorn.run(
+        "optimized_server:app",
+        host="0.0.0.0",
+        port=8005,
+        reload=True,
+        loop="uvloop",
+        http="httptools"
+    )
\ No newline at end of file
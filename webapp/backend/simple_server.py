@@ -5,18 +5,36 @@ Testing without complex dependencies
 
 import os
 import sys
+import functools
+import hashlib
 import json
+import logging
+import random
+import re
+import sqlite3
+import subprocess
+import time
 import traceback
+from collections import OrderedDict
 import asyncio
+from contextlib import asynccontextmanager
 from pathlib import Path
 from dotenv import load_dotenv
+import aiofiles
 import httpx
+import orjson
 from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, HTMLResponse, FileResponse
 from datetime import datetime
 from typing import Optional, Dict, Any, List
 
+# Poll-loop diagnostics go through logging at DEBUG so the message
+# formatting and stdout write are skipped entirely at the default level;
+# user-facing startup prints stay as prints
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+logger = logging.getLogger(__name__)
+
 # Initialize directories - ensure all video storage paths exist
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 VIDEOS_DIR = os.path.join(BASE_DIR, "videos")
@@ -31,6 +49,18 @@ for dir_path in [VIDEOS_DIR, INPUT_DIR, PROCESSED_DIR, THUMBNAILS_DIR]:
 
 print(f"📁 Video storage structure initialized at: {VIDEOS_DIR}")
 
+# Directories ensured above at import time; per-job re-checks consult this
+# set instead of issuing a blocking mkdir syscall on the event loop
+_ENSURED_DIRS = {VIDEOS_DIR, INPUT_DIR, PROCESSED_DIR, THUMBNAILS_DIR}
+
+async def _ensure_dir(path: str):
+    """Create path once, off the event loop; later calls are a set lookup"""
+    if path not in _ENSURED_DIRS:
+        await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(os.makedirs, path, exist_ok=True)
+        )
+        _ENSURED_DIRS.add(path)
+
 # Load environment variables from the project root
 env_path = os.path.join(BASE_DIR, '.env')
 load_dotenv(env_path)
@@ -99,9 +129,102 @@ ai_client = httpx.AsyncClient(
     follow_redirects=True  # Follow redirects automatically
 )
 
-async def generate_video_description(prompt: str, style: str, duration: str, orientation: str, camera_view: str = None, background: str = None) -> str:
+# Shared Sora client, reused across generations: building a client per call
+# pays a fresh TCP+TLS handshake every time and churns file descriptors
+# under concurrent jobs, while keep-alive makes repeat calls nearly free
+sora_client = httpx.AsyncClient(
+    base_url="https://api.openai.com",
+    headers={
+        "Authorization": f"Bearer {OPENAI_API_KEY}",
+        "Content-Type": "application/json"
+    },
+    transport=httpx.AsyncHTTPTransport(retries=3),
+    limits=httpx.Limits(max_keepalive_connections=20, keepalive_expiry=30),
+    timeout=300.0,  # 5 minutes for video generation
+    verify=True
+)
+
+# Template-description constants, built once at import: the fallback path
+# used to reconstruct these dicts on every call and scan each keyword with
+# a substring search; the inverted keyword->category map makes detection a
+# set of O(1) lookups over the prompt's tokens
+CATEGORIES = {
+    'nature': ['landscape', 'forest', 'ocean', 'mountain', 'sunset', 'sunrise', 'wildlife', 'garden'],
+    'urban': ['city', 'building', 'street', 'traffic', 'skyline', 'architecture', 'downtown'],
+    'tech': ['robot', 'ai', 'futuristic', 'cyber', 'digital', 'hologram', 'sci-fi'],
+    'abstract': ['abstract', 'geometric', 'pattern', 'kaleidoscope', 'fractal', 'artistic'],
+    'people': ['person', 'human', 'character', 'portrait', 'dancer', 'athlete'],
+    'fantasy': ['magic', 'fantasy', 'dragon', 'wizard', 'mythical', 'fairy', 'enchanted']
+}
+
+KEYWORD_TO_CATEGORY = {kw: cat for cat, kws in CATEGORIES.items() for kw in kws}
+
+STYLE_DESCRIPTORS = {
+    'cinematic': 'cinematic masterpiece with Hollywood-level production values',
+    'realistic': 'photorealistic rendering that looks incredibly lifelike',
+    'animated': 'beautifully animated with smooth, flowing visuals',
+    'documentary': 'authentic documentary-style footage with natural feel',
+    'artistic': 'creative artistic interpretation with unique visual flair',
+    'vintage': 'nostalgic vintage aesthetic with classic film qualities'
+}
+
+_TOKEN_RE = re.compile(r"[\w-]+")
+
+# Invariant instruction block for GPT description requests. OpenAI's
+# automatic prefix cache matches on leading tokens, so the static
+# instructions come first (in the system message) and the per-video
+# fields are appended last in the user message — the old layout
+# interpolated variable fields at the top and defeated the cache.
+_DESCRIPTION_SYSTEM_PROMPT = (
+    "You are an expert YouTube content creator and SEO specialist who creates "
+    "viral video descriptions.\n\n"
+    "Create an engaging, SEO-optimized YouTube description for an AI-generated "
+    "video using the details the user provides.\n\n"
+    "The description should be:\n"
+    "- 200-400 words long\n"
+    "- Exciting and engaging to read\n"
+    "- Include relevant hashtags\n"
+    "- Mention AI/Sora technology\n"
+    "- Be SEO-friendly with good keywords\n"
+    "- Include a call-to-action\n"
+    "- Professional but enthusiastic tone\n\n"
+    "Format it as a proper YouTube description with emojis and line breaks "
+    "for readability."
+)
+
+# In-process cache for GPT-generated descriptions: identical parameter
+# tuples otherwise trigger a fresh (slow, paid) GPT call every time.
+# Entries are only cached when the temperature is low enough that the
+# output is effectively deterministic; the default 0.7 stays uncached.
+DESCRIPTION_TEMPERATURE = float(os.getenv("DESCRIPTION_TEMPERATURE", "0.7"))
+_DESCRIPTION_CACHE_TTL = 3600.0  # seconds
+_DESCRIPTION_CACHE_MAX = 256
+_description_cache: "OrderedDict[str, tuple]" = OrderedDict()
+
+def _description_cache_get(key: str) -> Optional[str]:
+    entry = _description_cache.get(key)
+    if entry is None:
+        return None
+    value, ts = entry
+    if time.time() - ts > _DESCRIPTION_CACHE_TTL:
+        del _description_cache[key]
+        return None
+    _description_cache.move_to_end(key)
+    return value
+
+def _description_cache_put(key: str, value: str):
+    _description_cache[key] = (value, time.time())
+    _description_cache.move_to_end(key)
+    while len(_description_cache) > _DESCRIPTION_CACHE_MAX:
+        _description_cache.popitem(last=False)
+
+async def generate_video_description(prompt: str, style: str, duration: str, orientation: str, camera_view: str = None, background: str = None, websocket: WebSocket = None) -> str:
     """
     Generate an engaging, SEO-optimized YouTube description based on video parameters
+
+    When a websocket is supplied the GPT call is streamed: tokens are
+    forwarded to the client as they arrive, so the first words show up in
+    hundreds of milliseconds instead of after the full 800-token decode.
     """
     try:
         print(f"\n=== Generating Video Description ===")
@@ -112,47 +235,85 @@ async def generate_video_description(prompt: str, style: str, duration: str, ori
         # Try GPT-powered description generation first
         if OPENAI_API_KEY and USE_SORA_AI:
             try:
-                description_prompt = f"""
-                Create an engaging, SEO-optimized YouTube description for an AI-generated video with these details:
-                
-                Video Content: {prompt}
-                Style: {style}
-                Duration: {duration}
-                Orientation: {orientation}
-                Camera View: {camera_view or 'N/A'}
-                Background: {background or 'N/A'}
-                
-                The description should be:
-                - 200-400 words long
-                - Exciting and engaging to read
-                - Include relevant hashtags
-                - Mention AI/Sora technology
-                - Be SEO-friendly with good keywords
-                - Include a call-to-action
-                - Professional but enthusiastic tone
-                
-                Format it as a proper YouTube description with emojis and line breaks for readability.
-                """
-                
+                # Variable fields go in a minimal user message appended
+                # after the invariant system block, so every request shares
+                # the same token prefix for the server-side prompt cache
+                details_prompt = (
+                    f"Video Content: {prompt}\n"
+                    f"Style: {style}\n"
+                    f"Duration: {duration}\n"
+                    f"Orientation: {orientation}\n"
+                    f"Camera View: {camera_view or 'N/A'}\n"
+                    f"Background: {background or 'N/A'}"
+                )
+
                 gpt_data = {
                     "model": "gpt-4",
                     "messages": [
-                        {"role": "system", "content": "You are an expert YouTube content creator and SEO specialist who creates viral video descriptions."},
-                        {"role": "user", "content": description_prompt}
+                        {"role": "system", "content": _DESCRIPTION_SYSTEM_PROMPT},
+                        {"role": "user", "content": details_prompt}
                     ],
                     "max_tokens": 800,
-                    "temperature": 0.7
+                    "temperature": DESCRIPTION_TEMPERATURE,
+                    # Route similar-shape requests to the same warm cache node
+                    "prompt_cache_key": hashlib.sha256(f"{style}|{orientation}".encode()).hexdigest()
                 }
-                
-                response = await ai_client.post("/v1/chat/completions", json=gpt_data)
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    generated_description = result["choices"][0]["message"]["content"]
-                    
-                    print(f"✅ GPT-powered description generated ({len(generated_description)} characters)")
-                    return generated_description.strip()
-                    
+
+                # At deterministic temperatures, a repeat of the same inputs
+                # can skip the network round trip entirely
+                cache_key = None
+                if DESCRIPTION_TEMPERATURE <= 0.2:
+                    cache_key = hashlib.sha256(json.dumps(
+                        [prompt, style, duration, orientation, camera_view, background],
+                        sort_keys=True
+                    ).encode()).hexdigest()
+                    cached = _description_cache_get(cache_key)
+                    if cached is not None:
+                        print(f"✅ Description served from cache ({len(cached)} characters)")
+                        if websocket is not None:
+                            await websocket.send_text(cached)
+                        return cached
+
+                if websocket is not None:
+                    # Streaming branch: parse the SSE frames OpenAI emits
+                    # (data: {...} lines, "data: [DONE]" terminator), push
+                    # each content delta to the browser and accumulate the
+                    # full text for the caller
+                    chunks = []
+                    async with ai_client.stream(
+                        "POST", "/v1/chat/completions", json={**gpt_data, "stream": True}
+                    ) as response:
+                        if response.status_code == 200:
+                            async for line in response.aiter_lines():
+                                if not line.startswith("data: "):
+                                    continue
+                                payload = line[6:]
+                                if payload.strip() == "[DONE]":
+                                    break
+                                delta = json.loads(payload)["choices"][0].get("delta", {})
+                                content = delta.get("content")
+                                if content:
+                                    chunks.append(content)
+                                    await websocket.send_text(content)
+
+                    if chunks:
+                        generated_description = "".join(chunks).strip()
+                        print(f"✅ GPT-powered description streamed ({len(generated_description)} characters)")
+                        if cache_key:
+                            _description_cache_put(cache_key, generated_description)
+                        return generated_description
+                else:
+                    response = await ai_client.post("/v1/chat/completions", json=gpt_data)
+
+                    if response.status_code == 200:
+                        result = response.json()
+                        generated_description = result["choices"][0]["message"]["content"].strip()
+
+                        print(f"✅ GPT-powered description generated ({len(generated_description)} characters)")
+                        if cache_key:
+                            _description_cache_put(cache_key, generated_description)
+                        return generated_description
+
             except Exception as gpt_error:
                 print(f"⚠️ GPT description generation failed: {gpt_error}")
         
@@ -161,33 +322,14 @@ async def generate_video_description(prompt: str, style: str, duration: str, ori
         
         # Extract key elements from the prompt
         prompt_lower = prompt.lower()
-        
-        # Determine content category
-        categories = {
-            'nature': ['landscape', 'forest', 'ocean', 'mountain', 'sunset', 'sunrise', 'wildlife', 'garden'],
-            'urban': ['city', 'building', 'street', 'traffic', 'skyline', 'architecture', 'downtown'],
-            'tech': ['robot', 'ai', 'futuristic', 'cyber', 'digital', 'hologram', 'sci-fi'],
-            'abstract': ['abstract', 'geometric', 'pattern', 'kaleidoscope', 'fractal', 'artistic'],
-            'people': ['person', 'human', 'character', 'portrait', 'dancer', 'athlete'],
-            'fantasy': ['magic', 'fantasy', 'dragon', 'wizard', 'mythical', 'fairy', 'enchanted']
-        }
-        
-        detected_category = 'general'
-        for category, keywords in categories.items():
-            if any(keyword in prompt_lower for keyword in keywords):
-                detected_category = category
-                break
-        
-        # Style-specific descriptors
-        style_descriptors = {
-            'cinematic': 'cinematic masterpiece with Hollywood-level production values',
-            'realistic': 'photorealistic rendering that looks incredibly lifelike',
-            'animated': 'beautifully animated with smooth, flowing visuals',
-            'documentary': 'authentic documentary-style footage with natural feel',
-            'artistic': 'creative artistic interpretation with unique visual flair',
-            'vintage': 'nostalgic vintage aesthetic with classic film qualities'
-        }
-        
+
+        # Determine content category via the precomputed keyword map
+        tokens = _TOKEN_RE.findall(prompt_lower)
+        detected_category = next(
+            (KEYWORD_TO_CATEGORY[t] for t in tokens if t in KEYWORD_TO_CATEGORY),
+            'general'
+        )
+
         # Duration-based content
         duration_num = int(duration.replace('s', ''))
         if duration_num <= 5:
@@ -201,7 +343,7 @@ async def generate_video_description(prompt: str, style: str, duration: str, ori
         description_parts = [
             f"🎬 Incredible AI-Generated Video: {prompt.title()}",
             "",
-            f"Watch this {duration_desc} {style_descriptors.get(style, 'AI-generated')} video created using cutting-edge artificial intelligence technology! This {duration} {style} video showcases the amazing capabilities of modern AI in creating stunning visual content.",
+            f"Watch this {duration_desc} {STYLE_DESCRIPTORS.get(style, 'AI-generated')} video created using cutting-edge artificial intelligence technology! This {duration} {style} video showcases the amazing capabilities of modern AI in creating stunning visual content.",
             "",
             "✨ Video Details:",
             f"🎨 Style: {style.title()}",
@@ -268,20 +410,360 @@ async def generate_video_thumbnail(prompt: str, video_path: str, style: str = "r
     print(f"⚠️ Thumbnail generation disabled in Sora-only mode")
     print(f"💡 Use Sora AI to generate thumbnail images separately if needed")
     return None
-            
-    # SORA AI ONLY MODE - No thumbnail generation
-    print(f"\n=== Sora AI Only Mode - Thumbnail Generation Disabled ===")
-    print(f"Video: {video_path}")
-    print(f"Prompt: {prompt}")
-    print(f"⚠️ Thumbnail generation disabled in Sora-only mode")
-    print(f"💡 Use Sora AI to generate thumbnail images separately if needed")
+
+# Constant lookup tables for the download path, built once instead of
+# re-allocated on every completion
+_URL_FIELDS = ('download_url', 'file_url', 'url', 'video_url', 'content_url')
+_VIDEO_CT_MARKERS = ('video', 'octet-stream')
+
+# Sora request prep constants: frame size by orientation and the
+# supported duration range
+_SIZE_BY_ORIENTATION = {"portrait": "720x1280", "landscape": "1280x720", "square": "1024x1024"}
+_DURATION_BOUNDS = (4, 20)
+
+# Optional JIT acceleration for the fallback frame synthesiser; the
+# server runs fine without numba and simply keeps the NumPy path
+try:
+    import numpy as _np
+except ImportError:
+    _np = None
+
+try:
+    import numba as _numba
+except ImportError:
+    _numba = None
+
+_make_fallback_frame = None
+if _np is not None and _numba is not None:
+    @_numba.njit(cache=True, parallel=True)
+    def _make_fallback_frame(out, i, total_frames, fps):
+        # Fused gradient + rectangle + time-block synthesis, writing
+        # directly into the caller's buffer; mirrors the NumPy rules below
+        height = out.shape[0]
+        width = out.shape[1]
+        for y in _numba.prange(height):
+            intensity = int(30 + y / height * 50)
+            for x in range(width):
+                out[y, x, 0] = intensity
+                out[y, x, 1] = intensity // 2
+                out[y, x, 2] = intensity // 3
+
+        rect_x = int(i / total_frames * width) % width
+        rect_y = height // 3
+        rect_w = width // 4
+        rect_h = height // 6
+        if rect_x + rect_w < width and rect_y + rect_h < height:
+            for y in range(rect_y, rect_y + rect_h):
+                for x in range(rect_x, rect_x + rect_w):
+                    out[y, x, 0] = 100
+                    out[y, x, 1] = 150
+                    out[y, x, 2] = 200
+
+        current_second = i // fps
+        if i % 15 < 8:
+            time_y = height - 100
+            for digit_pos in range(min(current_second, 10)):
+                x_pos = 50 + digit_pos * 30
+                if x_pos + 20 < width:
+                    for y in range(time_y, time_y + 20):
+                        for x in range(x_pos, x_pos + 20):
+                            out[y, x, 0] = 255
+                            out[y, x, 1] = 255
+                            out[y, x, 2] = 100
+
+    try:
+        # Warm-compile at import so the first fallback doesn't pay JIT cost
+        _make_fallback_frame(_np.empty((144, 160, 3), _np.uint8), 0, 1, 30)
+    except Exception:
+        _make_fallback_frame = None
+
+# Fallback synthesis constants, derived once instead of per invocation
+_FALLBACK_DIMS = {"portrait": (720, 1280), "landscape": (1280, 720)}
+
+if _np is not None:
+    @functools.lru_cache(maxsize=4)
+    def _gradient_template(width: int, height: int):
+        """Precomputed (H,W,3) gradient, shared across fallback generations.
+
+        Callers must copy before stamping frame-specific elements onto it.
+        """
+        col = (30 + _np.arange(height) / height * 50).astype(_np.uint8)
+        return _np.ascontiguousarray(
+            _np.broadcast_to(
+                _np.stack([col, col // 2, col // 3], axis=1)[:, None, :],
+                (height, width, 3)
+            )
+        )
+
+@functools.lru_cache(maxsize=None)
+def _ffmpeg_exe() -> str:
+    """Path to the ffmpeg binary, resolved once per process.
+
+    Prefer imageio-ffmpeg's bundled binary (what the old imageio writer
+    used), so hosts without a system ffmpeg still work; fall back to PATH.
+    """
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return 'ffmpeg'
+
+@functools.lru_cache(maxsize=None)
+def _ffmpeg_has_encoder(name: str) -> bool:
+    """Probe the local ffmpeg for an encoder, once per process"""
+    try:
+        out = subprocess.run(
+            [_ffmpeg_exe(), '-hide_banner', '-encoders'],
+            capture_output=True, text=True, timeout=10
+        )
+        return name in out.stdout
+    except Exception:
+        return False
+
+class _FfmpegPipeWriter:
+    """Raw RGB pipe into an ffmpeg child, with the imageio writer interface.
+
+    imageio routes every frame through its own Python-level serialization
+    before ffmpeg sees the bytes; writing frame.tobytes() straight to the
+    encoder's stdin skips that layer and one full-frame copy per frame.
+    """
+
+    def __init__(self, filepath: str, width: int, height: int, fps: int, codec_args: List[str]):
+        self._proc = subprocess.Popen(
+            [_ffmpeg_exe(), '-y', '-f', 'rawvideo', '-vcodec', 'rawvideo',
+             '-s', f'{width}x{height}', '-pix_fmt', 'rgb24', '-r', str(fps),
+             '-i', '-'] + codec_args + [filepath],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+
+    def append_data(self, frame):
+        self._proc.stdin.write(frame.tobytes())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._proc.stdin.close()
+        self._proc.wait()
+        return False
+
+def _open_fallback_writer(filepath: str, width: int, height: int, fps: int) -> _FfmpegPipeWriter:
+    """Open a speed-tuned ffmpeg pipe for placeholder encoding.
+
+    Placeholder clips are throwaway content, so encoding dominates their
+    wall time for no benefit at the default libx264 medium preset. Prefer
+    SVT-AV1 at its fastest tier (all cores); fall back to x264 ultrafast
+    when the local ffmpeg lacks libsvtav1.
+    """
+    if _ffmpeg_has_encoder('libsvtav1'):
+        codec_args = ['-c:v', 'libsvtav1', '-preset', '13',
+                      '-svtav1-params', 'lp=6', '-pix_fmt', 'yuv420p']
+    else:
+        codec_args = ['-c:v', 'libx264', '-preset', 'ultrafast',
+                      '-tune', 'zerolatency', '-crf', '30', '-pix_fmt', 'yuv420p']
+    return _FfmpegPipeWriter(filepath, width, height, fps, codec_args)
+
+async def _stream_to_file(response, dest: str) -> Optional[int]:
+    """Stream a response body to dest in 64KB chunks; return the byte count
+    if it looks like a real video (>10KB), else None."""
+    file_size = 0
+    async with aiofiles.open(dest, 'wb') as f:
+        async for chunk in response.aiter_bytes(chunk_size=1 << 16):
+            await f.write(chunk)
+            file_size += len(chunk)
+    if file_size > 10000:  # Reasonable video file size
+        return file_size
+    return None
+
+async def _try_download_direct(video_id: str, dest: str) -> Optional[int]:
+    """Method 1: the video endpoint itself serves the bytes"""
+    async with sora_client.stream("GET", f"/v1/videos/{video_id}") as response:
+        if response.status_code != 200:
+            return None
+        content_type = response.headers.get('content-type', '').lower()
+        if not any(m in content_type for m in _VIDEO_CT_MARKERS):
+            return None
+        return await _stream_to_file(response, dest)
+
+async def _try_download_url(status_result: Dict[str, Any], dest: str) -> Optional[int]:
+    """Method 2: the status payload carries a download URL"""
+    download_url = next((status_result[f] for f in _URL_FIELDS if f in status_result), None)
+    if not download_url:
+        return None
+
+    print(f"📥 Found download URL: {download_url}")
+    # Absolute URLs bypass the client's base_url, so the shared
+    # keep-alive pool is reused here
+    async with sora_client.stream("GET", download_url) as response:
+        if response.status_code != 200:
+            return None
+        return await _stream_to_file(response, dest)
+
+async def _try_download_alt(video_id: str, dest: str) -> Optional[int]:
+    """Method 3: alternative download endpoints"""
+    for alt_endpoint in [f"/v1/videos/{video_id}/download", f"/v1/videos/{video_id}/content"]:
+        try:
+            async with sora_client.stream("GET", alt_endpoint) as response:
+                if response.status_code != 200:
+                    continue
+                content_type = response.headers.get('content-type', '').lower()
+                if 'video' not in content_type:
+                    continue
+                file_size = await _stream_to_file(response, dest)
+                if file_size:
+                    print(f"🎉 Sora video downloaded via {alt_endpoint} ({file_size} bytes)")
+                    return file_size
+        except Exception:
+            continue
     return None
 
+async def _download_sora_video(video_id: str, status_result: Dict[str, Any], filepath: str) -> Optional[int]:
+    """Race every download strategy and keep the first valid MP4.
+
+    The serial attempt order paid the sum of the method latencies on the
+    completion tail; racing pays only the fastest. Each strategy streams
+    into its own .part file, the winner is renamed onto filepath, and the
+    losers are cancelled and cleaned up.
+    """
+    # The status poll just fetched this job's payload; if it already names
+    # an asset URL there is no point re-GETting the same status endpoint
+    # hoping for bytes — fetch the asset directly and save a round trip
+    if any(f in status_result for f in _URL_FIELDS):
+        strategies = [_try_download_url(status_result, f"{filepath}.part0")]
+    else:
+        strategies = [_try_download_direct(video_id, f"{filepath}.part0")]
+    strategies.append(_try_download_alt(video_id, f"{filepath}.part1"))
+
+    parts = [f"{filepath}.part{i}" for i in range(len(strategies))]
+    tasks = [asyncio.create_task(coro) for coro in strategies]
+    part_of = dict(zip(tasks, parts))
+
+    file_size = None
+    pending = set(tasks)
+    try:
+        while pending and file_size is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                size = None
+                try:
+                    size = task.result()
+                except Exception as e:
+                    print(f"⚠️ Download method failed: {str(e)}")
+                if size and file_size is None:
+                    os.replace(part_of[task], filepath)
+                    file_size = size
+        return file_size
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
+        for part in parts:
+            try:
+                if os.path.exists(part):
+                    os.remove(part)
+            except OSError:
+                pass
+
+# Backpressure for Sora generations: each job holds poll state and an
+# in-flight download, and unbounded fan-out both trips OpenAI rate limits
+# (429s) and lets memory grow with the queue. Extra jobs wait their turn.
+SORA_SEM = asyncio.Semaphore(int(os.getenv("SORA_MAX_CONCURRENCY", "3")))
+
+# Persistent generation cache: the in-flight map above dies with the
+# process, but Sora outputs are stable for a given request tuple, so the
+# key -> filename mapping is also kept in a small SQLite table. A repeat
+# request after a restart returns the existing file instead of paying a
+# full multi-minute generation. The sqlite3 calls run via
+# asyncio.to_thread so the event loop never blocks on disk.
+_GEN_CACHE_PATH = os.path.join(VIDEOS_DIR, "sora_cache.sqlite")
+_GEN_CACHE_TTL = 30 * 86400  # seconds
+
+def _gen_cache_init():
+    conn = sqlite3.connect(_GEN_CACHE_PATH)
+    try:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS gen_cache(key TEXT PRIMARY KEY, filename TEXT, ts REAL)"
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+_gen_cache_init()
+
+def _gen_cache_get(key: str) -> Optional[str]:
+    conn = sqlite3.connect(_GEN_CACHE_PATH)
+    try:
+        row = conn.execute(
+            "SELECT filename, ts FROM gen_cache WHERE key=?", (key,)
+        ).fetchone()
+    finally:
+        conn.close()
+    if not row:
+        return None
+    filename, ts = row
+    if time.time() - ts > _GEN_CACHE_TTL:
+        return None
+    if not os.path.exists(os.path.join(PROCESSED_DIR, filename)):
+        return None
+    return filename
+
+def _gen_cache_put(key: str, filename: str):
+    conn = sqlite3.connect(_GEN_CACHE_PATH)
+    try:
+        conn.execute(
+            "INSERT OR REPLACE INTO gen_cache(key, filename, ts) VALUES(?, ?, ?)",
+            (key, filename, time.time())
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+# In-flight generations keyed by request hash: a concurrent request for
+# the same (prompt, duration, style, orientation) awaits the first one's
+# Future instead of firing a second multi-minute, paid Sora job
+_INFLIGHT: Dict[str, asyncio.Future] = {}
+
 async def generate_sora_video(prompt: str, duration: str, style: str, orientation: str) -> str:
     """
     Generate a video using ONLY Sora AI - no fallbacks, no placeholders
     Returns the filename of the generated video
+
+    Identical concurrent requests coalesce onto one Sora job, and at most
+    SORA_MAX_CONCURRENCY generations run at once; the rest queue on the
+    semaphore.
     """
+    key = hashlib.sha256(f"{prompt}|{duration}|{style}|{orientation}".encode()).hexdigest()
+    existing = _INFLIGHT.get(key)
+    if existing is not None:
+        print(f"🔁 Identical generation already in flight - awaiting its result")
+        return await existing
+
+    # Register the Future before the first await: a second identical
+    # request arriving during the cache lookup must find it and coalesce
+    # rather than launch a duplicate paid Sora job
+    fut = asyncio.get_running_loop().create_future()
+    _INFLIGHT[key] = fut
+    try:
+        # A recent identical generation may have survived on disk
+        filename = await asyncio.to_thread(_gen_cache_get, key)
+        if filename:
+            print(f"✅ Reusing cached Sora video: {filename}")
+        else:
+            async with SORA_SEM:
+                filename = await _generate_sora_video(prompt, duration, style, orientation)
+            await asyncio.to_thread(_gen_cache_put, key, filename)
+        fut.set_result(filename)
+        return filename
+    except Exception as e:
+        fut.set_exception(e)
+        raise
+    finally:
+        _INFLIGHT.pop(key, None)
+
+async def _generate_sora_video(prompt: str, duration: str, style: str, orientation: str) -> str:
     print(f"\n=== Sora AI Video Generation (EXCLUSIVE MODE) ===")
     print(f"Prompt: {prompt}")
     print(f"Duration: {duration}, Style: {style}, Orientation: {orientation}")
@@ -292,26 +774,18 @@ async def generate_sora_video(prompt: str, duration: str, style: str, orientatio
         print(f"❌ {error_msg}")
         raise AIError(error_msg, status_code=503)
     
-    # Convert duration to seconds - ensure we handle the duration properly
+    # Convert duration to seconds, clamped to the range Sora supports
     try:
-        duration_seconds = int(duration.replace("s", ""))
-        # Ensure minimum duration is respected for Sora
-        if duration_seconds < 4:
-            duration_seconds = 4
-        # Sora typically supports up to 20 seconds
-        elif duration_seconds > 20:
-            duration_seconds = 20
+        duration_seconds = max(_DURATION_BOUNDS[0], min(_DURATION_BOUNDS[1], int(duration.replace("s", ""))))
     except:
         duration_seconds = 10  # Default to 10 seconds
-    
+
     print(f"🎬 Parsed duration: {duration_seconds} seconds from input '{duration}'")
-    
+
     # Prepare Sora AI request with correct parameters
-    if orientation == "portrait":
-        size = "720x1280"  # Portrait format
-    else:
-        size = "1280x720"  # Landscape format
-        
+    size = _SIZE_BY_ORIENTATION.get(orientation, "1280x720")
+
+
     # Sora API request - duration included in prompt for better control
     sora_data = {
         "model": "sora-2-pro", 
@@ -323,18 +797,7 @@ async def generate_sora_video(prompt: str, duration: str, style: str, orientatio
     
     # Use the Sora endpoint
     sora_endpoint = "/v1/videos"
-    
-    # Create API client for Sora
-    sora_client = httpx.AsyncClient(
-        base_url="https://api.openai.com",
-        headers={
-            "Authorization": f"Bearer {OPENAI_API_KEY}",
-            "Content-Type": "application/json"
-        },
-        timeout=300.0,  # 5 minutes for video generation
-        verify=True
-    )
-    
+
     try:
         print(f"🔍 Using Sora endpoint: {sora_endpoint}")
         print(f"🔑 API Key configured: {'✅ Yes' if OPENAI_API_KEY else '❌ No'}")
@@ -350,8 +813,10 @@ async def generate_sora_video(prompt: str, duration: str, style: str, orientatio
         
         if response.status_code == 200:
             print(f"✅ Sora AI request successful!")
-            result = response.json()
-            print(f"📋 Sora Response: {result}")
+            # orjson parses the raw bytes in C, several times faster than
+            # stdlib json — this runs once per poll for minutes-long jobs
+            result = orjson.loads(response.content)
+            logger.debug("Sora response: %s", result)
             
             # Sora API returns a job object - poll for completion
             video_id = result.get("id")
@@ -362,102 +827,57 @@ async def generate_sora_video(prompt: str, duration: str, style: str, orientatio
             
             print(f"🎬 Sora video job created: {video_id}, status: {status}")
             
-            # Poll for completion (Sora videos take time to generate)
-            max_attempts = 120  # 10 minutes max wait
+            # Poll for completion with adaptive backoff: a short initial
+            # interval picks up fast jobs quickly, then the delay grows
+            # exponentially (capped ~15s, with jitter) so long jobs don't
+            # hammer the status endpoint. Any progress movement resets the
+            # backoff so near-complete jobs are polled tightly again.
+            max_wait = 600.0  # 10 minutes wall-clock budget
+            elapsed = 0.0
             attempt = 0
-            
-            while attempt < max_attempts:
-                print(f"🔄 Polling attempt {attempt + 1}/{max_attempts} for video {video_id}")
-                
+            last_progress = -1
+
+            while elapsed < max_wait:
+                delay = min(15.0, 1.5 ** min(attempt, 8)) + random.uniform(0, 0.5)
+                await asyncio.sleep(delay)
+                elapsed += delay
+                attempt += 1
+                logger.debug("Polling video %s (%.0fs elapsed)", video_id, elapsed)
+
                 # Check video status
                 status_response = await sora_client.get(f"/v1/videos/{video_id}")
                 
                 if status_response.status_code == 200:
-                    status_result = status_response.json()
+                    status_result = orjson.loads(status_response.content)
                     current_status = status_result.get("status")
                     progress = status_result.get("progress", 0)
                     
-                    print(f"📊 Video {video_id} status: {current_status}, progress: {progress}%")
-                    
+                    logger.debug("Video %s status: %s progress: %s%%", video_id, current_status, progress)
+
+                    if progress != last_progress:
+                        # The job is moving — drop back to tight polling
+                        last_progress = progress
+                        attempt = 0
+
                     if current_status == "completed":
-                        # Video is ready! Download it
-                        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                        # Video is ready! Download it. time.strftime formats
+                        # at C level without building a datetime object
+                        timestamp = time.strftime("%Y%m%d_%H%M%S")
                         filename = f"sora_video_{duration_seconds}s_{timestamp}.mp4"
                         filepath = os.path.join(PROCESSED_DIR, filename)
                         
                         print(f"📥 Downloading Sora video content for ID: {video_id}")
-                        
-                        # Try different methods to get the video content
-                        video_downloaded = False
-                        
-                        # Method 1: Direct video content
-                        try:
-                            video_content_response = await sora_client.get(f"/v1/videos/{video_id}")
-                            if video_content_response.status_code == 200:
-                                content_type = video_content_response.headers.get('content-type', '')
-                                if 'video' in content_type.lower() or 'octet-stream' in content_type.lower():
-                                    with open(filepath, 'wb') as f:
-                                        f.write(video_content_response.content)
-                                    
-                                    file_size = len(video_content_response.content)
-                                    if file_size > 10000:  # Reasonable video file size
-                                        print(f"🎉 Sora video downloaded: {filename} ({file_size} bytes)")
-                                        video_downloaded = True
-                        except Exception as e:
-                            print(f"⚠️ Direct download method failed: {str(e)}")
-                        
-                        # Method 2: Look for download URL in response
-                        if not video_downloaded:
-                            try:
-                                response_data = status_result
-                                download_url = None
-                                for field in ['download_url', 'file_url', 'url', 'video_url', 'content_url']:
-                                    if field in response_data:
-                                        download_url = response_data[field]
-                                        break
-                                
-                                if download_url:
-                                    print(f"📥 Found download URL: {download_url}")
-                                    async with httpx.AsyncClient(timeout=120.0) as download_client:
-                                        video_response = await download_client.get(download_url)
-                                        if video_response.status_code == 200:
-                                            with open(filepath, 'wb') as f:
-                                                f.write(video_response.content)
-                                            
-                                            file_size = len(video_response.content)
-                                            if file_size > 10000:
-                                                print(f"🎉 Sora video downloaded from URL: {filename} ({file_size} bytes)")
-                                                video_downloaded = True
-                            except Exception as e:
-                                print(f"⚠️ URL download method failed: {str(e)}")
-                        
-                        # Method 3: Try alternative endpoints
-                        if not video_downloaded:
-                            for alt_endpoint in [f"/v1/videos/{video_id}/download", f"/v1/videos/{video_id}/content"]:
-                                try:
-                                    alt_response = await sora_client.get(alt_endpoint)
-                                    if alt_response.status_code == 200:
-                                        content_type = alt_response.headers.get('content-type', '')
-                                        if 'video' in content_type.lower():
-                                            with open(filepath, 'wb') as f:
-                                                f.write(alt_response.content)
-                                            
-                                            file_size = len(alt_response.content)
-                                            if file_size > 10000:
-                                                print(f"🎉 Sora video downloaded via {alt_endpoint}: {filename} ({file_size} bytes)")
-                                                video_downloaded = True
-                                                break
-                                except:
-                                    continue
-                        
-                        if video_downloaded and os.path.exists(filepath):
-                            file_size = os.path.getsize(filepath)
+
+                        # Race all download strategies; first valid file wins
+                        file_size = await _download_sora_video(video_id, status_result, filepath)
+
+                        if file_size:
                             print(f"✅ Sora video successfully saved: {filepath} ({file_size} bytes)")
-                            
+
                             # Thumbnail generation disabled in Sora-only mode
                             print(f"📸 Thumbnail generation skipped (Sora-only mode)")
                             thumbnail_filename = None
-                            
+
                             return filename
                         else:
                             raise AIError("Sora video completed but could not be downloaded")
@@ -468,26 +888,19 @@ async def generate_sora_video(prompt: str, duration: str, style: str, orientatio
                         raise AIError(f"Sora video generation failed: {error_msg}")
                     
                     elif current_status in ["queued", "processing", "generating"]:
-                        # Still processing, wait and retry
-                        await asyncio.sleep(5)  # Wait 5 seconds between polls
-                        attempt += 1
+                        # Still processing, back off and retry
                         continue
                     else:
-                        print(f"⚠️ Unknown status: {current_status}")
-                        await asyncio.sleep(5)
-                        attempt += 1
+                        logger.warning("Unknown status for video %s: %s", video_id, current_status)
                         continue
                 else:
-                    print(f"❌ Status check failed: HTTP {status_response.status_code}")
-                    error_text = status_response.text
-                    if attempt > 10:  # After multiple attempts, show more detail
-                        print(f"Status check error: {error_text}")
-                    await asyncio.sleep(5)
-                    attempt += 1
+                    logger.warning("Status check failed for video %s: HTTP %s", video_id, status_response.status_code)
+                    if elapsed > 60:  # After a minute of failures, show more detail
+                        logger.warning("Status check error: %s", status_response.text)
                     continue
-            
+
             # If we get here, we timed out
-            raise TimeoutError(f"Sora video generation timed out after {max_attempts} attempts")
+            raise TimeoutError(f"Sora video generation timed out after {elapsed:.0f} seconds")
         
         elif response.status_code == 400:
             error_text = response.text
@@ -516,8 +929,6 @@ async def generate_sora_video(prompt: str, duration: str, style: str, orientatio
     except httpx.NetworkError as e:
         print(f"❌ Network error: {str(e)}")
         raise NetworkError(f"Network error connecting to Sora API: {str(e)}")
-    finally:
-        await sora_client.aclose()
 
 
 # Helper function for error handling
@@ -533,29 +944,16 @@ async def process_video_generation(video: Dict[str, Any]):
         print("\n=== Starting Video Generation Processing ===")
         print(f"Starting job {video.get('job_id')} for video {video.get('id')}")
         
-        # Get and validate paths
+        # Get and validate paths — these are the module-level constants,
+        # already created at import; _ensure_dir is a set lookup unless
+        # something removed them out from under us
         try:
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            project_root = os.path.dirname(os.path.dirname(current_dir))
-            videos_dir = os.path.join(project_root, "videos")
-            processed_dir = os.path.join(videos_dir, "processed")
-            
-            print(f"Directory structure:")
-            print(f"- Current: {current_dir}")
-            print(f"- Project root: {project_root}")
-            print(f"- Videos: {videos_dir}")
-            print(f"- Processed: {processed_dir}")
-            
-            # Ensure directories exist
-            for dir_path in [videos_dir, processed_dir]:
-                try:
-                    os.makedirs(dir_path, exist_ok=True)
-                    print(f"Verified directory: {dir_path}")
-                except Exception as dir_error:
-                    error_msg = f"Failed to create directory {dir_path}: {str(dir_error)}"
-                    print(f"Directory error: {error_msg}")
-                    raise RuntimeError(error_msg)
-                
+            videos_dir = VIDEOS_DIR
+            processed_dir = PROCESSED_DIR
+
+            for dir_path in (videos_dir, processed_dir):
+                await _ensure_dir(dir_path)
+
         except Exception as path_error:
             error_msg = f"Path setup error: {str(path_error)}"
             print(f"Path error: {error_msg}")
@@ -568,14 +966,7 @@ async def process_video_generation(video: Dict[str, Any]):
             video["processed_dir"] = processed_dir
             video["versions"] = []
             print(f"Initialized version tracking")
-            
-            stages = [
-                ("initializing", 2),
-                ("processing", 3),
-                ("rendering", 2),
-                ("finalizing", 1)
-            ]
-            
+
         except Exception as setup_error:
             error_msg = f"Video setup error: {str(setup_error)}"
             print(f"Setup error: {error_msg}")
@@ -586,19 +977,20 @@ async def process_video_generation(video: Dict[str, Any]):
             """Process a single version of the video"""
             try:
                 print(f"\n--- Processing Version {version + 1} ---")
+                # One wall-clock read per version, formatted at C level,
+                # instead of fresh datetime construction per field
+                now_ts = time.time()
                 version_data = {
-                    "id": f"v{version + 1}_{datetime.now().timestamp()}",
+                    "id": f"v{version + 1}_{now_ts}",
                     "version": version + 1,
                     "status": "processing",
-                    "created_at": datetime.now().isoformat()
+                    "created_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(now_ts))
                 }
                 
-                # Simulate processing stages
-                for stage, duration in stages:
-                    print(f"Version {version + 1}: {stage}")
-                    video["version_statuses"][version] = stage
-                    await asyncio.sleep(duration)
-                
+                # Go straight to the real work: the old simulated stage
+                # loop slept 8 seconds per version before the Sora call
+                video["version_statuses"][version] = "processing"
+
                 # Generate output video using Sora AI
                 try:
                     print(f"Generating video with Sora AI for version {version + 1}")
@@ -627,7 +1019,7 @@ async def process_video_generation(video: Dict[str, Any]):
                             "status": "completed",
                             "url": f"/api/v1/videos/view/{filename}",
                             "filename": filename,
-                            "completed_at": datetime.now().isoformat(),
+                            "completed_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
                             "generated_with": generation_method
                         })
                         
@@ -636,15 +1028,19 @@ async def process_video_generation(video: Dict[str, Any]):
                         print(f"Sora AI failed (falling back to placeholder): {str(ai_error)}")
                         
                         # Generate filename for fallback
-                        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                        timestamp = time.strftime("%Y%m%d_%H%M%S")
                         filename = f"fallback_video_{video['id']}_{timestamp}_v{version+1}.mp4"
                         filepath = os.path.join(processed_dir, filename)
                         
                         # Create fallback placeholder video with proper duration
                         try:
-                            import numpy as np
-                            import imageio
-                            
+                            # numpy is imported (guarded) at module top; the
+                            # cold path no longer pays the import either
+                            if _np is None:
+                                raise ImportError("numpy is required for the fallback video path")
+                            np = _np
+
+
                             # Parse duration properly
                             try:
                                 duration = int(video.get("duration", "10s").replace("s", ""))
@@ -662,47 +1058,58 @@ async def process_video_generation(video: Dict[str, Any]):
                             
                             # Use proper video dimensions based on orientation
                             orientation = video.get("orientation", "landscape")
-                            if orientation == "portrait":
-                                width, height = 720, 1280
-                            else:
-                                width, height = 1280, 720
-                            
-                            frames = []
-                            for i in range(total_frames):
-                                # Create a more interesting placeholder with text overlay
-                                frame = np.zeros((height, width, 3), dtype=np.uint8)
-                                frame.fill(30)  # Dark background
-                                
-                                # Add animated elements
-                                # Gradient background
-                                for y in range(height):
-                                    intensity = int(30 + (y / height) * 50)
-                                    frame[y, :] = [intensity, intensity // 2, intensity // 3]
-                                
-                                # Animated rectangle with time-based position
-                                progress = (i / total_frames) * width
-                                rect_x = int(progress) % width
-                                rect_y = height // 3
-                                rect_w = width // 4
-                                rect_h = height // 6
-                                
-                                # Ensure rectangle stays within bounds
-                                if rect_x + rect_w < width and rect_y + rect_h < height:
-                                    frame[rect_y:rect_y+rect_h, rect_x:rect_x+rect_w] = [100, 150, 200]
-                                
-                                # Add time indicator
-                                current_second = i // fps
-                                if i % 15 < 8:  # Blinking time display
-                                    # Simple time text simulation with colored blocks
-                                    time_y = height - 100
-                                    for digit_pos in range(min(current_second, 10)):
-                                        x_pos = 50 + digit_pos * 30
-                                        if x_pos + 20 < width:
-                                            frame[time_y:time_y+20, x_pos:x_pos+20] = [255, 255, 100]
-                                    
-                                frames.append(frame)
-                            
-                            imageio.mimsave(filepath, frames, fps=fps, format='mp4')
+                            width, height = _FALLBACK_DIMS.get(orientation, (1280, 720))
+
+                            # Gradient template cached across generations —
+                            # repeated Sora failures reuse the same array
+                            # instead of rebuilding it per clip
+                            grad = _gradient_template(width, height)
+
+                            # Stream each frame straight into the encoder: the
+                            # old frames list held every (H,W,3) buffer
+                            # (~2.6MB each at 720p) until mimsave ran, so a
+                            # long clip pinned gigabytes; the writer encodes
+                            # and releases one frame at a time
+                            # With numba present, a fused JIT kernel fills one
+                            # reusable buffer per frame instead of the
+                            # copy-and-stamp NumPy path
+                            buf = np.empty((height, width, 3), np.uint8) if _make_fallback_frame is not None else None
+
+                            with _open_fallback_writer(filepath, width, height, fps) as writer:
+                                for i in range(total_frames):
+                                    if buf is not None:
+                                        _make_fallback_frame(buf, i, total_frames, fps)
+                                        writer.append_data(buf)
+                                        continue
+
+                                    # Fresh copy of the gradient, stamped with the
+                                    # animated elements via slice assignment
+                                    frame = grad.copy()
+
+                                    # Animated rectangle with time-based position
+                                    progress = (i / total_frames) * width
+                                    rect_x = int(progress) % width
+                                    rect_y = height // 3
+                                    rect_w = width // 4
+                                    rect_h = height // 6
+
+                                    # Ensure rectangle stays within bounds
+                                    if rect_x + rect_w < width and rect_y + rect_h < height:
+                                        frame[rect_y:rect_y+rect_h, rect_x:rect_x+rect_w] = [100, 150, 200]
+
+                                    # Add time indicator
+                                    current_second = i // fps
+                                    if i % 15 < 8:  # Blinking time display
+                                        # Simple time text simulation with colored
+                                        # blocks, stamped in one fancy-indexed store
+                                        time_y = height - 100
+                                        xs = 50 + 30 * np.arange(min(current_second, 10))
+                                        xs = xs[xs + 20 < width]
+                                        if xs.size:
+                                            cols = (xs[:, None] + np.arange(20)).ravel()
+                                            frame[time_y:time_y+20, cols] = [255, 255, 100]
+
+                                    writer.append_data(frame)
                             
                             # Validate the created placeholder video
                             if os.path.exists(filepath) and os.path.getsize(filepath) > 1000:
@@ -714,12 +1121,14 @@ async def process_video_generation(video: Dict[str, Any]):
                                 style_text = video.get('style', 'realistic')
                                 thumbnail_filename = await generate_video_thumbnail(prompt_text, filepath, style_text)
                                 
-                                # Add to video tracking
+                                # Add to video tracking; one wall-clock read
+                                # shared by both records below
+                                done_iso = time.strftime("%Y-%m-%dT%H:%M:%S")
                                 video_record = {
                                     "filename": filename,
                                     "filepath": filepath,
                                     "file_size": file_size,
-                                    "created_at": datetime.now().isoformat(),
+                                    "created_at": done_iso,
                                     "source": "fallback_placeholder",
                                     "duration": f"{duration}s",
                                     "prompt": prompt_text,
@@ -735,7 +1144,7 @@ async def process_video_generation(video: Dict[str, Any]):
                                     "status": "completed",
                                     "url": f"/api/v1/videos/view/{filename}",
                                     "filename": filename,
-                                    "completed_at": datetime.now().isoformat(),
+                                    "completed_at": done_iso,
                                     "generated_with": "fallback_placeholder",
                                     "sora_error": str(ai_error),
                                     "file_size": file_size,
@@ -767,12 +1176,13 @@ async def process_video_generation(video: Dict[str, Any]):
                 
             except Exception as version_error:
                 print(f"Version {version + 1} failed: {str(version_error)}")
+                err_ts = time.time()
                 return {
-                    "id": f"error_{version}_{datetime.now().timestamp()}",
+                    "id": f"error_{version}_{err_ts}",
                     "version": version + 1,
                     "status": "error",
                     "error": str(version_error),
-                    "created_at": datetime.now().isoformat()
+                    "created_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(err_ts))
                 }
 
         # Process all versions
@@ -821,10 +1231,9 @@ async def process_video_generation(video: Dict[str, Any]):
 
             # Persist the updated video metadata (filename, versions, status, etc.)
             global videos_data
-            for idx, v in enumerate(videos_data):
-                if v.get("job_id") == video.get("job_id"):
-                    videos_data[idx] = video
-                    break
+            idx = _videos_by_job_id.get(video.get("job_id"))
+            if idx is not None:
+                videos_data[idx] = video
             save_video_library(videos_data)
             
         except Exception as gather_error:
@@ -841,10 +1250,18 @@ async def process_video_generation(video: Dict[str, Any]):
         video["status"] = "failed"
         video["error"] = error_msg
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Close the shared API clients so pooled connections shut down cleanly
+    await sora_client.aclose()
+    await ai_client.aclose()
+
 app = FastAPI(
     title="YouTube Automation Pipeline",
     description="AI-powered video generation and YouTube upload automation",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # WebSocket Manager
@@ -857,14 +1274,41 @@ class ConnectionManager:
         self.active_connections.append(websocket)
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        # Idempotent: broadcast may have already shed this socket before
+        # the endpoint's own handler calls disconnect again
+        if websocket in self.active_connections:
+            self.active_connections.remove(websocket)
 
     async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            await connection.send_text(message)
+        # Iterate a copy and shed failed sockets individually: one dead
+        # connection must not raise out of the loop and abort whatever the
+        # caller is streaming to everyone else
+        for connection in list(self.active_connections):
+            try:
+                await connection.send_text(message)
+            except Exception:
+                self.disconnect(connection)
 
 manager = ConnectionManager()
 
+class _BroadcastStream:
+    """Duck-typed stand-in for a WebSocket that fans send_text out to every
+    connected /ws client, so description tokens can stream to whoever is
+    watching without tying the HTTP endpoint to one socket.
+
+    Tokens go out in a JSON envelope: every other frame on /ws is JSON
+    (heartbeats etc.) and the clients JSON-parse each frame, so raw text
+    fragments would throw in their handlers."""
+
+    def __init__(self, manager: ConnectionManager):
+        self._manager = manager
+
+    async def send_text(self, message: str):
+        await self._manager.broadcast(json.dumps({
+            "type": "description_token",
+            "content": message
+        }))
+
 # CORS middleware for React frontend
 app.add_middleware(
     CORSMiddleware,
@@ -913,11 +1357,22 @@ def load_video_library():
     return []
 
 def save_video_library(library):
-    with open(VIDEO_LIBRARY_PATH, "w") as f:
-        json.dump(library, f, indent=2, default=str)
+    # Serialize with orjson (C-speed, handles numpy scalars) and write to a
+    # temp file first: os.replace is atomic, so a crash mid-save can never
+    # leave a truncated video_library.json behind
+    tmp_path = VIDEO_LIBRARY_PATH + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(orjson.dumps(library, default=str, option=orjson.OPT_SERIALIZE_NUMPY))
+    os.replace(tmp_path, VIDEO_LIBRARY_PATH)
 
 videos_data = load_video_library()
 
+# job_id -> index into videos_data, so the persist path replaces an entry
+# with one dict lookup instead of scanning the whole library per save
+_videos_by_job_id = {
+    v["job_id"]: i for i, v in enumerate(videos_data) if v.get("job_id")
+}
+
 pipeline_status = {
     "status": "idle",
     "queue_size": 0,
@@ -1107,129 +1562,125 @@ class DirectUploadRequest(BaseModel):
     description: Optional[str] = None
     tags: Optional[list] = None
 
+# Prompt-fragment lookup tables for generate_detailed_prompt, built once at
+# import instead of being reallocated on every call. The duration map also
+# replaces the per-call int(...).replace("s", "") parse of the enum value.
+_DURATION_SECONDS = {
+    VideoDuration.SECONDS_4: 4,
+    VideoDuration.SECONDS_10: 10,
+    VideoDuration.SECONDS_15: 15,
+}
+
+_STYLE_TECH_SPECS = {
+    VideoStyle.CINEMATIC: "high production value, professional cinematography, 24fps feel",
+    VideoStyle.REALISTIC: "photorealistic rendering, natural lighting, authentic textures",
+    VideoStyle.ANIMATED: "smooth animation, consistent art style, fluid motion",
+    VideoStyle.DOCUMENTARY: "handheld camera feel, natural imperfections, authentic atmosphere",
+    VideoStyle.ARTISTIC: "creative visual effects, unique artistic interpretation, expressive colors",
+    VideoStyle.VINTAGE: "film grain, period-accurate aesthetics, nostalgic color grading"
+}
+
+_CAMERA_SPECS = {
+    CameraView.WIDE: "wide establishing shot, expansive view, showing full scene context",
+    CameraView.CLOSE_UP: "intimate close-up shots, detailed focus, emotional connection",
+    CameraView.AERIAL: "drone-like aerial perspective, sweeping overhead views, bird's eye angle",
+    CameraView.POV: "first-person perspective, immersive viewpoint, subjective camera",
+    CameraView.TRACKING: "smooth tracking shot, following subject motion, dynamic movement",
+    CameraView.STATIC: "fixed camera position, stable composition, stationary framing"
+}
+
+_BACKGROUND_SPECS = {
+    BackgroundType.NATURAL: "organic natural environment, outdoor setting, landscape elements",
+    BackgroundType.URBAN: "cityscape, architectural elements, urban environment with buildings",
+    BackgroundType.STUDIO: "controlled studio environment, professional backdrop, clean setting",
+    BackgroundType.ABSTRACT: "non-representational background, artistic abstract elements",
+    BackgroundType.MINIMAL: "clean minimalist background, simple composition, uncluttered space"
+}
+
+_LIGHTING_DETAILS = {
+    "natural": "soft natural daylight, realistic shadows, organic light sources",
+    "dramatic": "high contrast lighting, strong shadows, moody atmosphere",
+    "soft": "diffused gentle lighting, minimal shadows, even illumination",
+    "golden": "warm golden hour lighting, amber tones, cinematic glow",
+    "blue": "cool blue lighting, modern atmosphere, tech-inspired tones",
+    "neon": "vibrant neon lighting, electric colors, urban night atmosphere"
+}
+
+_COLOR_DETAILS = {
+    "warm": "warm color palette with oranges, reds, and yellows",
+    "cool": "cool color palette with blues, greens, and purples",
+    "monochrome": "black and white with selective color accents",
+    "vibrant": "highly saturated, bold and vivid colors",
+    "pastel": "soft pastel tones, gentle and soothing colors",
+    "earth": "natural earth tones, browns, greens, and muted colors"
+}
+
+_WEATHER_DETAILS = {
+    "sunny": "bright sunny conditions, clear skies, high visibility",
+    "cloudy": "overcast sky, diffused lighting, dramatic cloud formations",
+    "rainy": "rainfall, wet surfaces, atmospheric precipitation effects",
+    "foggy": "misty fog effects, reduced visibility, mysterious atmosphere",
+    "snowy": "snowfall, winter conditions, cold weather atmosphere",
+    "stormy": "storm conditions, dramatic weather, intense atmospheric effects"
+}
+
+_TIME_DETAILS = {
+    "dawn": "early morning dawn, soft sunrise lighting, peaceful atmosphere",
+    "morning": "bright morning light, fresh daylight, energetic mood",
+    "noon": "midday sun, high contrast lighting, maximum visibility",
+    "afternoon": "warm afternoon light, golden tones, comfortable atmosphere",
+    "dusk": "evening twilight, golden hour, transitional lighting",
+    "night": "nighttime atmosphere, artificial lighting, dark ambient tones"
+}
+
+_QUALITY_SPEC = ("ultra-high definition, professional video production quality, "
+                 "smooth motion blur where appropriate, crisp details and sharp focus, "
+                 "consistent visual style throughout")
+
 def generate_detailed_prompt(request: GenerationRequest) -> str:
     """Generate a detailed, optimized prompt for Sora based on user preferences"""
     try:
-        print("\n=== Generating Enhanced Detailed Prompt ===")
-        print(f"Base prompt: {request.base_prompt}")
-        print(f"Duration: {request.duration}")
-        print(f"Style: {request.style}")
-        print(f"Orientation: {request.orientation}")
-        print(f"Camera view: {request.camera_view}")
-        print(f"Background: {request.background}")
-        
-        # Enhanced base prompt structure for better AI understanding
-        duration_seconds = int(request.duration.value.replace("s", ""))
-        
-        # Start with technical specifications for Sora
-        tech_specs = []
-        
-        # Resolution and aspect ratio specifications
-        if request.orientation.value == "portrait":
-            tech_specs.append("9:16 aspect ratio, vertical format")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Generating enhanced detailed prompt: base=%r duration=%s style=%s "
+                "orientation=%s camera=%s background=%s",
+                request.base_prompt, request.duration, request.style,
+                request.orientation, request.camera_view, request.background
+            )
+
+        duration_seconds = _DURATION_SECONDS[request.duration]
+
+        # Technical specifications for Sora
+        if request.orientation is VideoOrientation.PORTRAIT:
+            aspect_spec = "9:16 aspect ratio, vertical format"
         else:
-            tech_specs.append("16:9 aspect ratio, horizontal format")
-        
-        # Duration specification
-        tech_specs.append(f"{duration_seconds} second duration")
-        
-        # Style-specific technical requirements
-        style_tech_specs = {
-            VideoStyle.CINEMATIC: "high production value, professional cinematography, 24fps feel",
-            VideoStyle.REALISTIC: "photorealistic rendering, natural lighting, authentic textures",
-            VideoStyle.ANIMATED: "smooth animation, consistent art style, fluid motion",
-            VideoStyle.DOCUMENTARY: "handheld camera feel, natural imperfections, authentic atmosphere",
-            VideoStyle.ARTISTIC: "creative visual effects, unique artistic interpretation, expressive colors",
-            VideoStyle.VINTAGE: "film grain, period-accurate aesthetics, nostalgic color grading"
-        }
-        tech_specs.append(style_tech_specs[request.style])
-        
-        # Camera and movement specifications
-        camera_specs = {
-            CameraView.WIDE: "wide establishing shot, expansive view, showing full scene context",
-            CameraView.CLOSE_UP: "intimate close-up shots, detailed focus, emotional connection",
-            CameraView.AERIAL: "drone-like aerial perspective, sweeping overhead views, bird's eye angle",
-            CameraView.POV: "first-person perspective, immersive viewpoint, subjective camera",
-            CameraView.TRACKING: "smooth tracking shot, following subject motion, dynamic movement",
-            CameraView.STATIC: "fixed camera position, stable composition, stationary framing"
-        }
-        
-        # Background and environment specifications
-        background_specs = {
-            BackgroundType.NATURAL: "organic natural environment, outdoor setting, landscape elements",
-            BackgroundType.URBAN: "cityscape, architectural elements, urban environment with buildings",
-            BackgroundType.STUDIO: "controlled studio environment, professional backdrop, clean setting",
-            BackgroundType.ABSTRACT: "non-representational background, artistic abstract elements",
-            BackgroundType.MINIMAL: "clean minimalist background, simple composition, uncluttered space"
-        }
-        
-        # Construct the detailed prompt
+            aspect_spec = "16:9 aspect ratio, horizontal format"
+        tech_specs = f"{aspect_spec}, {duration_seconds} second duration, {_STYLE_TECH_SPECS[request.style]}"
+
+        # Construct the detailed prompt in a single pass over the lookup tables
         prompt_parts = [
-            # Main subject and action (enhanced base prompt)
             f"A high-quality video showing {request.base_prompt}",
-            
-            # Technical specifications
-            f"Technical specs: {', '.join(tech_specs)}",
-            
-            # Camera and movement
-            f"Camera work: {camera_specs[request.camera_view]}",
-            
-            # Environment and background
-            f"Setting: {background_specs[request.background]}",
+            f"Technical specs: {tech_specs}",
+            f"Camera work: {_CAMERA_SPECS[request.camera_view]}",
+            f"Setting: {_BACKGROUND_SPECS[request.background]}",
         ]
-        
-        # Enhanced lighting specifications
+
         if request.lighting:
-            lighting_details = {
-                "natural": "soft natural daylight, realistic shadows, organic light sources",
-                "dramatic": "high contrast lighting, strong shadows, moody atmosphere",
-                "soft": "diffused gentle lighting, minimal shadows, even illumination",
-                "golden": "warm golden hour lighting, amber tones, cinematic glow",
-                "blue": "cool blue lighting, modern atmosphere, tech-inspired tones",
-                "neon": "vibrant neon lighting, electric colors, urban night atmosphere"
-            }
-            lighting_desc = lighting_details.get(request.lighting.lower(), f"{request.lighting} lighting")
+            lighting_desc = _LIGHTING_DETAILS.get(request.lighting.lower(), f"{request.lighting} lighting")
             prompt_parts.append(f"Lighting: {lighting_desc}")
-        
-        # Enhanced color palette specifications
+
         if request.color_palette:
-            color_details = {
-                "warm": "warm color palette with oranges, reds, and yellows",
-                "cool": "cool color palette with blues, greens, and purples",
-                "monochrome": "black and white with selective color accents",
-                "vibrant": "highly saturated, bold and vivid colors",
-                "pastel": "soft pastel tones, gentle and soothing colors",
-                "earth": "natural earth tones, browns, greens, and muted colors"
-            }
-            color_desc = color_details.get(request.color_palette.lower(), f"{request.color_palette} color palette")
+            color_desc = _COLOR_DETAILS.get(request.color_palette.lower(), f"{request.color_palette} color palette")
             prompt_parts.append(f"Colors: {color_desc}")
-        
-        # Weather and atmospheric conditions
+
         if request.weather:
-            weather_details = {
-                "sunny": "bright sunny conditions, clear skies, high visibility",
-                "cloudy": "overcast sky, diffused lighting, dramatic cloud formations",
-                "rainy": "rainfall, wet surfaces, atmospheric precipitation effects",
-                "foggy": "misty fog effects, reduced visibility, mysterious atmosphere",
-                "snowy": "snowfall, winter conditions, cold weather atmosphere",
-                "stormy": "storm conditions, dramatic weather, intense atmospheric effects"
-            }
-            weather_desc = weather_details.get(request.weather.lower(), f"{request.weather} weather conditions")
+            weather_desc = _WEATHER_DETAILS.get(request.weather.lower(), f"{request.weather} weather conditions")
             prompt_parts.append(f"Weather: {weather_desc}")
-        
-        # Time of day specifications
+
         if request.time_of_day:
-            time_details = {
-                "dawn": "early morning dawn, soft sunrise lighting, peaceful atmosphere",
-                "morning": "bright morning light, fresh daylight, energetic mood",
-                "noon": "midday sun, high contrast lighting, maximum visibility",
-                "afternoon": "warm afternoon light, golden tones, comfortable atmosphere",
-                "dusk": "evening twilight, golden hour, transitional lighting",
-                "night": "nighttime atmosphere, artificial lighting, dark ambient tones"
-            }
-            time_desc = time_details.get(request.time_of_day.lower(), f"{request.time_of_day} time setting")
+            time_desc = _TIME_DETAILS.get(request.time_of_day.lower(), f"{request.time_of_day} time setting")
             prompt_parts.append(f"Time: {time_desc}")
-        
+
         # Motion and pacing specifications based on duration
         if duration_seconds <= 5:
             prompt_parts.append("Pacing: quick dynamic action, fast-paced movement, high energy")
@@ -1237,32 +1688,23 @@ def generate_detailed_prompt(request: GenerationRequest) -> str:
             prompt_parts.append("Pacing: balanced rhythm, moderate pace, engaging motion")
         else:
             prompt_parts.append("Pacing: contemplative pace, smooth transitions, graceful movement")
-        
-        # Quality and production specifications
-        quality_specs = [
-            "ultra-high definition",
-            "professional video production quality",
-            "smooth motion blur where appropriate",
-            "crisp details and sharp focus",
-            "consistent visual style throughout"
-        ]
-        prompt_parts.append(f"Quality: {', '.join(quality_specs)}")
-        
-        # Additional creative details
+
+        prompt_parts.append(f"Quality: {_QUALITY_SPEC}")
+
         if request.additional_details:
             prompt_parts.append(f"Additional elements: {request.additional_details}")
-        
+
         # Final prompt assembly with clear structure
         final_prompt = ". ".join(prompt_parts) + "."
-        
-        print(f"✅ Enhanced prompt generated ({len(final_prompt)} characters)")
+
+        logger.debug("Enhanced prompt generated (%d characters)", len(final_prompt))
         return final_prompt
-        
+
     except Exception as e:
-        print(f"Error generating detailed prompt: {str(e)}")
+        logger.warning("Error generating detailed prompt: %s", e)
         # Fallback to simpler prompt if enhancement fails
         fallback_prompt = f"Create a {request.duration.value} {request.style.value} video showing {request.base_prompt} using {request.camera_view.value} camera with {request.background.value} background."
-        print(f"Using fallback prompt: {fallback_prompt}")
+        logger.debug("Using fallback prompt: %s", fallback_prompt)
         return fallback_prompt
 
 @app.post("/api/v1/videos/generate")
@@ -1313,6 +1755,7 @@ async def generate_video(request: GenerationRequest):
                 "error": None
             }
             videos_data.append(new_video)
+            _videos_by_job_id[job_id] = len(videos_data) - 1
             save_video_library(videos_data)
             print(f"Created video entry: {new_video}")
 
@@ -1426,14 +1869,19 @@ async def select_version(request: VersionSelectionRequest):
         # Generate engaging title (simulated)
         video["metadata"]["generated_title"] = f"🔥 MUST WATCH: {video['prompt'][:50]}... | Stunning {video['style']} Video"
         
-        # Generate SEO-optimized description using the new function
+        # Generate SEO-optimized description using the new function.
+        # Stream the tokens over /ws when any client is connected so the
+        # text appears as it decodes; with no listeners the plain
+        # request/response branch is cheaper.
+        stream_target = _BroadcastStream(manager) if manager.active_connections else None
         enhanced_description = await generate_video_description(
             prompt=video['prompt'],
             style=video['style'],
             duration=video['duration'],
             orientation=video['orientation'],
             camera_view=video.get('camera_view'),
-            background=video.get('background')
+            background=video.get('background'),
+            websocket=stream_target
         )
         video["metadata"]["generated_description"] = enhanced_description
         
@@ -2019,18 +2467,20 @@ async def upload_library_video(filename: str, request: Optional[Dict] = None):
             print(f"✅ Library video uploaded successfully: {upload_result['video_url']}")
             
             # Update or create video entry in videos_data for tracking
+            # Single timestamp per record so created_at/uploaded_at agree
+            uploaded_at = datetime.now().isoformat()
             library_entry = {
                 "id": len(videos_data) + 1,
                 "title": custom_title,
                 "filename": filename,
                 "status": "uploaded",
-                "created_at": datetime.now().isoformat(),
+                "created_at": uploaded_at,
                 "source": "library_upload",
                 "metadata": {
                     "youtube_status": "completed",
                     "youtube_url": upload_result["video_url"],
                     "youtube_video_id": upload_result["video_id"],
-                    "uploaded_at": datetime.now().isoformat(),
+                    "uploaded_at": uploaded_at,
                     "generated_title": custom_title,
                     "generated_description": custom_description
                 }
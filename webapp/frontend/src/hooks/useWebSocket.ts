@@ -37,7 +37,13 @@ export const useWebSocket = () => {
       ws.current.onmessage = (event) => {
         try {
           const message: WebSocketMessage = JSON.parse(event.data);
-          handleMessage(message);
+          // The server coalesces bursts into a batch envelope; unpack it
+          // and dispatch each inner message as if it arrived on its own
+          if (message.type === 'batch' && Array.isArray(message.messages)) {
+            message.messages.forEach(handleMessage);
+          } else {
+            handleMessage(message);
+          }
         } catch (error) {
           console.error('Error parsing WebSocket message:', error);
         }
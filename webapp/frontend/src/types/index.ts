@@ -73,11 +73,12 @@ export interface AIStatus {
 }
 
 export interface WebSocketMessage {
-  type: 'status' | 'log' | 'ai_job';
+  type: 'status' | 'log' | 'ai_job' | 'batch';
   data?: any;
   job_id?: string;
   status?: string;
   message?: string;
+  messages?: WebSocketMessage[];
   result?: any;
 }
 